@@ -156,4 +156,23 @@ upgrade_gravityDB(){
         pihole-FTL sqlite3 -ni "${database}" < "${scriptPath}/19_to_20.sql"
         version=20
     fi
+    if [[ "$version" == "20" ]]; then
+        # Add columns to schedule the refresh of each adlist individually
+        echo -e "  ${INFO} Upgrading gravity database from version 20 to 21"
+        pihole-FTL sqlite3 -ni "${database}" < "${scriptPath}/20_to_21.sql"
+        version=21
+    fi
+    if [[ "$version" == "21" ]]; then
+        # Add table with the effective blocklist of every group and the
+        # triggers marking it as outdated
+        echo -e "  ${INFO} Upgrading gravity database from version 21 to 22"
+        pihole-FTL sqlite3 -ni "${database}" < "${scriptPath}/21_to_22.sql"
+        version=22
+    fi
+    if [[ "$version" == "22" ]]; then
+        # Add table to record the cost of regex filters
+        echo -e "  ${INFO} Upgrading gravity database from version 22 to 23"
+        pihole-FTL sqlite3 -ni "${database}" < "${scriptPath}/22_to_23.sql"
+        version=23
+    fi
 }
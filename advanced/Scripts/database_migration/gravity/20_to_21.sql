@@ -0,0 +1,14 @@
+.timeout 30000
+
+PRAGMA FOREIGN_KEYS=OFF;
+
+BEGIN TRANSACTION;
+
+ALTER TABLE adlist ADD COLUMN refresh_interval INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE adlist ADD COLUMN next_update INTEGER;
+ALTER TABLE adlist ADD COLUMN etag TEXT;
+ALTER TABLE adlist ADD COLUMN last_modified TEXT;
+
+UPDATE info SET value = 21 WHERE property = 'version';
+
+COMMIT;
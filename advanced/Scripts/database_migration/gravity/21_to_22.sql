@@ -0,0 +1,62 @@
+.timeout 30000
+
+PRAGMA FOREIGN_KEYS=OFF;
+
+BEGIN TRANSACTION;
+
+/* Effective blocklist of every group (gravity and denylist minus antigravity
+   and allowlist), only filled when enabled with 'pihole -g --by-group'.
+   ABP-style allow entries (||example.com^) also remove all subdomains, regex
+   allow filters are not applied. ABP-style gravity entries are kept as they
+   are and still cover their subdomains */
+CREATE TABLE gravity_by_group
+(
+    group_id INTEGER NOT NULL,
+    domain TEXT NOT NULL,
+    PRIMARY KEY (group_id, domain)
+) WITHOUT ROWID;
+
+DROP TRIGGER tr_adlist_update;
+CREATE TRIGGER tr_adlist_update AFTER UPDATE OF address,enabled,comment ON adlist
+    BEGIN
+      UPDATE adlist SET date_modified = (cast(strftime('%s', 'now') as int)) WHERE id = NEW.id;
+      UPDATE info SET value = 'stale' WHERE property = 'gravity_by_group';
+    END;
+
+DROP TRIGGER tr_domainlist_update;
+CREATE TRIGGER tr_domainlist_update AFTER UPDATE ON domainlist
+    BEGIN
+      UPDATE domainlist SET date_modified = (cast(strftime('%s', 'now') as int)) WHERE domain = NEW.domain;
+      UPDATE info SET value = 'stale' WHERE property = 'gravity_by_group';
+    END;
+
+DROP TRIGGER tr_group_update;
+CREATE TRIGGER tr_group_update AFTER UPDATE ON "group"
+    BEGIN
+      UPDATE "group" SET date_modified = (cast(strftime('%s', 'now') as int)) WHERE id = NEW.id;
+      UPDATE info SET value = 'stale' WHERE property = 'gravity_by_group';
+    END;
+
+CREATE TRIGGER tr_adlist_by_group_add AFTER INSERT ON adlist_by_group
+    BEGIN
+      UPDATE info SET value = 'stale' WHERE property = 'gravity_by_group';
+    END;
+
+CREATE TRIGGER tr_adlist_by_group_delete AFTER DELETE ON adlist_by_group
+    BEGIN
+      UPDATE info SET value = 'stale' WHERE property = 'gravity_by_group';
+    END;
+
+CREATE TRIGGER tr_domainlist_by_group_add AFTER INSERT ON domainlist_by_group
+    BEGIN
+      UPDATE info SET value = 'stale' WHERE property = 'gravity_by_group';
+    END;
+
+CREATE TRIGGER tr_domainlist_by_group_delete AFTER DELETE ON domainlist_by_group
+    BEGIN
+      UPDATE info SET value = 'stale' WHERE property = 'gravity_by_group';
+    END;
+
+UPDATE info SET value = 22 WHERE property = 'version';
+
+COMMIT;
@@ -0,0 +1,19 @@
+.timeout 30000
+
+PRAGMA FOREIGN_KEYS=OFF;
+
+BEGIN TRANSACTION;
+
+CREATE TABLE regex_profile
+(
+    domainlist_id INTEGER NOT NULL REFERENCES domainlist (id) ON DELETE CASCADE,
+    timestamp INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    cost INTEGER NOT NULL,
+    status INTEGER NOT NULL,
+    PRIMARY KEY (domainlist_id, timestamp)
+);
+
+UPDATE info SET value = 23 WHERE property = 'version';
+
+COMMIT;
@@ -0,0 +1,281 @@
+#!/usr/bin/env bash
+# Pi-hole: A black hole for Internet advertisements
+# (c) 2026 Pi-hole, LLC (https://pi-hole.net)
+# Network-wide ad blocking via your own hardware.
+#
+# Maintenance of Pi-hole's long-term query database
+#
+# This file is copyright under the latest version of the EUPL.
+# Please see LICENSE file for your rights under this license.
+
+colfile="/opt/pihole/COL_TABLE"
+# shellcheck source="./advanced/Scripts/COL_TABLE"
+source ${colfile}
+
+readonly PI_HOLE_SCRIPT_DIR="/opt/pihole"
+utilsfile="${PI_HOLE_SCRIPT_DIR}/utils.sh"
+# shellcheck source="./advanced/Scripts/utils.sh"
+source "${utilsfile}"
+
+# Determine database location
+DBFILE=$(getFTLConfigValue "files.database")
+if [ -z "$DBFILE" ]; then
+    DBFILE="/etc/pihole/pihole-FTL.db"
+fi
+
+# Total time (in seconds) the maintenance run may take. Steps that would start
+# after the budget has been used up are skipped and picked up by the next run
+budget=300
+# Number of queries deleted per transaction. Every batch is committed on its
+# own so FTL can keep writing to the database in between
+prune_batch_size=10000
+# Number of free pages released per incremental vacuum step
+vacuum_batch_pages=2048
+
+helpFunc() {
+    echo "Usage: pihole db maintain [options]
+Example: 'pihole db maintain --budget 600'
+Maintain the long-term query database without stopping FTL
+
+Options:
+  --budget <seconds>  Maximum time to spend on maintenance (default: ${budget})
+  --days <days>       Delete queries older than this many days
+                        (default: FTL's database.maxDBdays setting)
+  --enable-incremental-vacuum
+                      Convert the database to incremental auto-vacuum so
+                        later runs can return free space to the disk. This
+                        rewrites the whole database once, needs as much free
+                        disk space as the database itself and FTL cannot
+                        store queries until it is done
+  -h, --help          Show this help dialog"
+    exit 0
+}
+
+# Run SQL against the long-term database. FTL keeps the database open, so wait
+# for locks instead of failing immediately
+db_query() {
+    printf ".timeout 30000\\n%s\\n" "${1}" | pihole-FTL sqlite3 -ni "${DBFILE}"
+}
+
+now_ms() {
+    date +%s%3N
+}
+
+# Combined size of the database and its write-ahead log in bytes
+db_size() {
+    local size wal_size
+    size=$(stat -c "%s" "${DBFILE}" 2>/dev/null)
+    wal_size=$(stat -c "%s" "${DBFILE}-wal" 2>/dev/null)
+    echo $(( ${size:-0} + ${wal_size:-0} ))
+}
+
+# Print a number of bytes in human-readable form
+format_bytes() {
+    awk -v b="${1}" 'BEGIN {
+        split("B KiB MiB GiB TiB", unit, " ")
+        i = 1
+        if (b < 0) { sign = "-"; b = -b }
+        while (b >= 1024 && i < 5) { b /= 1024; i++ }
+        printf "%s%.1f %s", sign, b, unit[i]
+    }'
+}
+
+# Returns success if there is still time left in the maintenance budget
+budget_left() {
+    [[ $(( $(now_ms) - start_time )) -lt $(( budget * 1000 )) ]]
+}
+
+# Print the result line of a maintenance step including its runtime and the
+# number of bytes reclaimed on disk
+# Takes three arguments: step description, start time and size before the step
+report_step() {
+    local str="${1}" step_start="${2}" size_before="${3}" elapsed
+    elapsed=$(( $(now_ms) - step_start ))
+    printf "%b  %b %s (%d.%03ds, reclaimed %s)\\n" "${OVER}" "${TICK}" "${str}" \
+        $((elapsed / 1000)) $((elapsed % 1000)) "$(format_bytes $(( size_before - $(db_size) )))"
+}
+
+# Delete queries older than the retention period in small batches
+prune_queries() {
+    local str="Pruning queries older than ${days} days" step_start size_before cutoff deleted total=0
+    if [[ "${days}" -le 0 ]]; then
+        echo -e "  ${INFO} Query retention is disabled, not pruning"
+        return
+    fi
+
+    echo -ne "  ${INFO} ${str}..."
+    step_start=$(now_ms)
+    size_before=$(db_size)
+    cutoff=$(( $(date +%s) - days * 86400 ))
+
+    while budget_left; do
+        if ! deleted=$(db_query "DELETE FROM query_storage WHERE id IN (SELECT id FROM query_storage WHERE timestamp < ${cutoff} LIMIT ${prune_batch_size}); SELECT changes();" 2>&1); then
+            echo -e "${OVER}  ${CROSS} ${str}\\n      ${deleted}"
+            return 1
+        fi
+        total=$(( total + deleted ))
+        if [[ "${deleted}" -lt "${prune_batch_size}" ]]; then
+            break
+        fi
+    done
+
+    if ! budget_left; then
+        str="${str} (time budget exhausted)"
+    fi
+    report_step "${str}, deleted ${total} queries" "${step_start}" "${size_before}"
+}
+
+# Return free pages to the file system. This is only possible if the database
+# uses incremental auto-vacuum, otherwise the free pages are reused by SQLite
+incremental_vacuum() {
+    local str="Releasing free database pages" step_start size_before mode free_pages
+    mode=$(db_query "PRAGMA auto_vacuum;")
+    free_pages=$(db_query "PRAGMA freelist_count;")
+    if [[ "${mode}" != "2" ]]; then
+        echo -e "  ${INFO} Incremental vacuum not enabled (see --enable-incremental-vacuum), ${free_pages:-0} free pages will be reused by new queries"
+        return
+    fi
+
+    echo -ne "  ${INFO} ${str}..."
+    step_start=$(now_ms)
+    size_before=$(db_size)
+
+    while [[ "${free_pages:-0}" -gt 0 ]] && budget_left; do
+        if ! free_pages=$(db_query "PRAGMA incremental_vacuum(${vacuum_batch_pages}); PRAGMA freelist_count;" 2>&1); then
+            echo -e "${OVER}  ${CROSS} ${str}\\n      ${free_pages}"
+            return 1
+        fi
+    done
+
+    report_step "${str}, ${free_pages:-0} pages left" "${step_start}" "${size_before}"
+}
+
+# Convert the database to incremental auto-vacuum. This is a one-off operation
+# that rewrites the whole database, after which incremental_vacuum can release
+# free pages on every run
+enable_incremental_vacuum() {
+    local str="Enabling incremental vacuum" step_start size_before output
+    if [[ "$(db_query "PRAGMA auto_vacuum;")" == "2" ]]; then
+        echo -e "  ${INFO} Incremental vacuum already enabled"
+        incremental_vacuum
+        return
+    fi
+
+    echo -e "  ${INFO} ${COL_YELLOW}Rewriting the whole database once, this needs as much free disk space as the database and FTL cannot store queries until it is done${COL_NC}"
+    echo -ne "  ${INFO} ${str}..."
+    step_start=$(now_ms)
+    size_before=$(db_size)
+
+    if ! output=$(db_query "PRAGMA auto_vacuum=INCREMENTAL; VACUUM;" 2>&1); then
+        echo -e "${OVER}  ${CROSS} ${str}\\n      ${output}"
+        return 1
+    fi
+    report_step "${str}" "${step_start}" "${size_before}"
+}
+
+# Refresh the query planner statistics. The analysis limit keeps this step short
+# even on very large databases
+optimize_database() {
+    local str="Optimizing database" step_start size_before output
+    echo -ne "  ${INFO} ${str}..."
+    step_start=$(now_ms)
+    size_before=$(db_size)
+
+    if ! output=$(db_query "PRAGMA analysis_limit=1000; ANALYZE; PRAGMA optimize;" 2>&1); then
+        echo -e "${OVER}  ${CROSS} ${str}\\n      ${output}"
+        return 1
+    fi
+    report_step "${str}" "${step_start}" "${size_before}"
+}
+
+# Move the content of the write-ahead log into the database and truncate the log
+checkpoint_wal() {
+    local str="Checkpointing write-ahead log" step_start size_before output
+    echo -ne "  ${INFO} ${str}..."
+    step_start=$(now_ms)
+    size_before=$(db_size)
+
+    if ! output=$(db_query "PRAGMA wal_checkpoint(TRUNCATE);" 2>&1); then
+        echo -e "${OVER}  ${CROSS} ${str}\\n      ${output}"
+        return 1
+    fi
+    # The first column is 1 if the checkpoint could not complete because FTL
+    # was writing to the database at the same time
+    if [[ "${output%%|*}" == "1" ]]; then
+        str="${str} (partial, database busy)"
+    fi
+    report_step "${str}" "${step_start}" "${size_before}"
+}
+
+maintainDatabase() {
+    local size_before elapsed vacuum_step="incremental_vacuum" failed=0
+
+    if [[ ! -f "${DBFILE}" ]]; then
+        echo -e "  ${CROSS} Database ${DBFILE} does not exist"
+        exit 1
+    fi
+
+    if [[ -z "${days}" ]]; then
+        days=$(getFTLConfigValue "database.maxDBdays")
+    fi
+    if [[ ! "${days}" =~ ^-?[0-9]+$ ]]; then
+        days=91
+    fi
+
+    echo -e "  ${INFO} Maintaining ${DBFILE} ($(format_bytes "$(db_size)"), time budget ${budget}s)"
+    start_time=$(now_ms)
+    size_before=$(db_size)
+
+    if [[ "${enable_incremental}" == true ]]; then
+        vacuum_step="enable_incremental_vacuum"
+    fi
+
+    for step in prune_queries "${vacuum_step}" optimize_database; do
+        if ! budget_left; then
+            echo -e "  ${INFO} Time budget exhausted, skipping remaining steps"
+            break
+        fi
+        "${step}" || failed=1
+    done
+
+    # Always checkpoint, this is what finally returns the space to the disk
+    checkpoint_wal || failed=1
+
+    elapsed=$(( $(now_ms) - start_time ))
+    if [[ "${failed}" -ne 0 ]]; then
+        printf "  %b Finished with errors in %d.%03ds, reclaimed %s in total\\n" "${CROSS}" \
+            $((elapsed / 1000)) $((elapsed % 1000)) "$(format_bytes $(( size_before - $(db_size) )))"
+        return 1
+    fi
+    printf "  %b Done in %d.%03ds, reclaimed %s in total\\n" "${TICK}" \
+        $((elapsed / 1000)) $((elapsed % 1000)) "$(format_bytes $(( size_before - $(db_size) )))"
+}
+
+if [[ "${1}" != "maintain" ]]; then
+    helpFunc
+fi
+shift
+
+# Process all options (if present)
+while [ "$#" -gt 0 ]; do
+    case "$1" in
+    "--budget" )
+        if [[ ! "${2}" =~ ^[0-9]+$ ]]; then
+            echo -e "  ${CROSS} Invalid time budget: ${2}"
+            exit 1
+        fi
+        budget="${2}"; shift ;;
+    "--days" )
+        if [[ ! "${2}" =~ ^[0-9]+$ ]]; then
+            echo -e "  ${CROSS} Invalid number of days: ${2}"
+            exit 1
+        fi
+        days="${2}"; shift ;;
+    "--enable-incremental-vacuum" ) enable_incremental=true ;;
+    "-h" | "--help" ) helpFunc ;;
+    * ) helpFunc ;;
+    esac
+    shift
+done
+
+maintainDatabase
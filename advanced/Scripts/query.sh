@@ -13,6 +13,7 @@
 PI_HOLE_INSTALL_DIR="/opt/pihole"
 max_results="20"
 partial="false"
+offline="false"
 domain=""
 
 # Source color table
@@ -20,6 +21,10 @@ colfile="/opt/pihole/COL_TABLE"
 # shellcheck source="./advanced/Scripts/COL_TABLE"
 . "${colfile}"
 
+# Source utils for getFTLConfigValue
+# shellcheck source="./advanced/Scripts/utils.sh"
+. "${PI_HOLE_INSTALL_DIR}/utils.sh"
+
 # Source api functions
 # shellcheck source="./advanced/Scripts/api.sh"
 . "${PI_HOLE_INSTALL_DIR}/api.sh"
@@ -32,6 +37,9 @@ Query the adlists for a specified domain
 Options:
   --partial            Search the adlists for partially matching domains
   --all                Return all query matches within the adlists
+  --offline            Search the gravity database directly instead of asking
+                       FTL (works while FTL is not running). Matches of regex
+                       filters are not reported
   -h, --help           Show this help dialog"
     exit 0
 }
@@ -103,10 +111,65 @@ GenerateOutput() {
     # If no exact results were found, suggest using partial matching
     if [ "${num_lists}" -eq 0 ] && [ "${num_gravity}" -eq 0 ] && [ "${partial}" = false ]; then
         printf "%s\n" "Hint: Try partial matching with"
-        printf "%s\n\n" "  ${COL_GREEN}pihole -q --partial ${domain}${COL_NC}"
+        if [ "${offline}" = true ]; then
+            printf "%s\n\n" "  ${COL_GREEN}pihole -q --offline --partial ${domain}${COL_NC}"
+        else
+            printf "%s\n\n" "  ${COL_GREEN}pihole -q --partial ${domain}${COL_NC}"
+        fi
     fi
 }
 
+# Answer the search from the gravity database without FTL. Regex filters are
+# not evaluated. The result has the same format as the search API so it can be
+# passed to GenerateOutput
+GetOfflineData() {
+    local gravitydb search suffix condition
+
+    gravitydb=$(getFTLConfigValue files.gravity)
+    gravitydb="${gravitydb:-/etc/pihole/gravity.db}"
+    if [ ! -e "${gravitydb}" ]; then
+        echo "Gravity database ${gravitydb} not found, please run 'pihole -g'" >&2
+        exit 1
+    fi
+    if [ ! -r "${gravitydb}" ]; then
+        echo "Permission denied reading ${gravitydb}, please try again with sudo" >&2
+        exit 1
+    fi
+
+    # Escape single quotes for SQL
+    search=$(printf %s "${domain}" | sed "s/'/''/g")
+
+    if [ "${partial}" = true ]; then
+        condition="instr(domain, '${search}') > 0"
+    else
+        # Exact matches and ABP-style entries covering the domain or any of
+        # its parent domains, e.g. ||example.com^ for www.example.com
+        condition="'${search}'"
+        suffix="${search}"
+        while true; do
+            condition="${condition},'||${suffix}^'"
+            case "${suffix}" in
+            *.*) suffix="${suffix#*.}" ;;
+            *) break ;;
+            esac
+        done
+        condition="domain IN (${condition})"
+    fi
+
+    pihole-FTL sqlite3 -ni "${gravitydb}" <<EOT
+PRAGMA query_only=1;
+SELECT json_object('search', json_object(
+    'domains', (SELECT json_group_array(json_object('domain', domain, 'type', CASE type WHEN 0 THEN 'allow' ELSE 'deny' END, 'kind', 'exact'))
+                FROM (SELECT domain, type FROM domainlist WHERE type IN (0, 1) AND ${condition} LIMIT ${max_results})),
+    'gravity', (SELECT json_group_array(json_object('domain', m.domain, 'address', a.address, 'type', CASE m.type WHEN 0 THEN 'block' ELSE 'allow' END))
+                FROM (SELECT domain, adlist_id, 0 AS type FROM gravity WHERE ${condition}
+                      UNION ALL
+                      SELECT domain, adlist_id, 1 AS type FROM antigravity WHERE ${condition}
+                      LIMIT ${max_results}) m
+                JOIN adlist a ON a.id = m.adlist_id)));
+EOT
+}
+
 Main() {
     local data
 
@@ -118,6 +181,13 @@ Main() {
     # https://github.com/pi-hole/FTL/pull/1715
     # no need to do it here
 
+    if [ "${offline}" = true ]; then
+        domain=$(printf %s "${domain}" | tr '[:upper:]' '[:lower:]')
+        data=$(GetOfflineData) || exit 1
+        GenerateOutput "${data}"
+        return
+    fi
+
     # Authenticate with FTL
     LoginAPI
 
@@ -136,6 +206,7 @@ while [ "$#" -gt 0 ]; do
     "-h" | "--help") Help ;;
     "--partial") partial="true" ;;
     "--all") max_results=10000 ;; # hard-coded FTL limit
+    "--offline") offline="true" ;;
     *) domain=$1 ;;
     esac
     shift
@@ -228,7 +228,7 @@ main() {
 
     if [[ "${FTL_update}" == true || "${core_update}" == true || "${web_update}" == true ]]; then
         # Update local and remote versions via updatechecker
-        /opt/pihole/updatecheck.sh
+        /opt/pihole/updatecheck.sh --no-cache
         echo -e "  ${INFO} Local version file information updated."
     fi
 
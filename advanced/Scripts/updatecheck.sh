@@ -28,17 +28,58 @@ function get_local_hash() {
 function get_remote_version() {
     # if ${2} is = "master" we need to use the "latest" endpoint, otherwise, we simply return null
     if [[ "${2}" == "master" ]]; then
-        curl -s "https://api.github.com/repos/pi-hole/${1}/releases/latest" 2>/dev/null | jq --raw-output .tag_name || return 1
+        local release
+        release="$(curl -s --max-time "${REMOTE_TIMEOUT}" "${GITHUB_API_URL}/${1}/releases/latest" 2>/dev/null)" || return 1
+        # --exit-status fails if there is no tag_name, e.g., when rate limited
+        jq --raw-output --exit-status .tag_name <<< "${release}" || return 1
     else
         echo "null"
     fi
 }
 
 function get_remote_hash() {
-    git ls-remote "https://github.com/pi-hole/${1}" --tags "${2}" | awk '{print substr($0, 1,8);}' || return 1
+    local refs
+    refs="$(timeout "${REMOTE_TIMEOUT}" git ls-remote "${GITHUB_URL}/${1}" --tags "${2}")" || return 1
+    awk '{print substr($0, 1,8);}' <<< "${refs}" || return 1
 }
 
-# Source the utils file for addOrEditKeyValPair()
+function cached_remote() {
+    # Run a remote lookup (all arguments after the first) and cache its result
+    # under the name given in ${1}. Cached results younger than CACHE_TTL
+    # seconds are returned without contacting the remote. If the lookup fails,
+    # an expired cached result is returned instead (if available)
+    local cache_file="${CACHE_DIR}/${1//\//_}" result
+    shift
+
+    if [[ -f "${cache_file}" ]] && [[ $(( $(date +%s) - $(stat -c "%Y" "${cache_file}") )) -lt "${CACHE_TTL}" ]]; then
+        cat "${cache_file}"
+        return 0
+    fi
+
+    if result="$("$@")"; then
+        # Write to a temporary file first as other lookups run at the same time
+        printf "%s\n" "${result}" > "${cache_file}.$$" && mv -f "${cache_file}.$$" "${cache_file}"
+        printf "%s\n" "${result}"
+    else
+        cat "${cache_file}" 2>/dev/null
+    fi
+}
+
+function lookup() {
+    # Run a lookup in the background, its output is stored under the key ${1}
+    # and can be read with get_result once all lookups have finished
+    local key="${1}"
+    shift
+    "$@" > "${RESULTS_DIR}/${key}" 2>/dev/null &
+}
+
+function get_result() {
+    local value
+    value="$(cat "${RESULTS_DIR}/${1}" 2>/dev/null)"
+    echo "${value}"
+}
+
+# Source the utils file for addOrEditKeyValPairs()
 # shellcheck source="./advanced/Scripts/utils.sh"
 . /opt/pihole/utils.sh
 
@@ -49,12 +90,32 @@ readonly ADMIN_INTERFACE_DIR
 rm -f "/etc/pihole/GitHubVersions"
 rm -f "/etc/pihole/localbranches"
 rm -f "/etc/pihole/localversions"
+rm -rf "/etc/pihole/versionsCache"
 
 # Create new versions file if it does not exist
 VERSION_FILE="/etc/pihole/versions"
 touch "${VERSION_FILE}"
 chmod 644 "${VERSION_FILE}"
 
+# Remote locations, can be overridden to check against a mirror or a local
+# test setup
+GITHUB_URL="${PIHOLE_GITHUB_URL:-https://github.com/pi-hole}"
+GITHUB_API_URL="${PIHOLE_GITHUB_API_URL:-https://api.github.com/repos/pi-hole}"
+# Maximum time (in seconds) a single remote lookup may take
+REMOTE_TIMEOUT=30
+
+# Results of remote lookups are cached for CACHE_TTL seconds
+CACHE_DIR="${PIHOLE_CACHE_DIR:-/var/cache/pihole}/versions"
+CACHE_TTL="${UPDATECHECK_CACHE_TTL:-3600}"
+if [[ "$1" == "--no-cache" ]]; then
+    CACHE_TTL=0
+fi
+mkdir -p -m 0755 "${CACHE_DIR}"
+
+# Temporary directory for the results of the concurrent lookups
+RESULTS_DIR="$(mktemp -d)"
+trap 'rm -rf "${RESULTS_DIR}"' EXIT
+
 # if /pihole.docker.tag file exists, we will use it's value later in this script
 DOCKER_TAG=$(cat /pihole.docker.tag 2>/dev/null)
 release_regex='^([0-9]+\.){1,2}(\*|[0-9]+)(-.*)?$'
@@ -69,68 +130,59 @@ if [[ "$1" == "reboot" ]]; then
     sleep 30
 fi
 
-# get Core versions
+# Gather all versions concurrently. The remote lookups depend on the local
+# branches, so these are determined first
 
-CORE_VERSION="$(get_local_version /etc/.pihole)"
-addOrEditKeyValPair "${VERSION_FILE}" "CORE_VERSION" "${CORE_VERSION}"
+lookup CORE_BRANCH get_local_branch /etc/.pihole
+lookup WEB_BRANCH get_local_branch "${ADMIN_INTERFACE_DIR}"
+lookup FTL_BRANCH pihole-FTL branch
+wait
 
-CORE_BRANCH="$(get_local_branch /etc/.pihole)"
-addOrEditKeyValPair "${VERSION_FILE}" "CORE_BRANCH" "${CORE_BRANCH}"
+CORE_BRANCH="$(get_result CORE_BRANCH)"
+WEB_BRANCH="$(get_result WEB_BRANCH)"
+FTL_BRANCH="$(get_result FTL_BRANCH)"
 
-CORE_HASH="$(get_local_hash /etc/.pihole)"
-addOrEditKeyValPair "${VERSION_FILE}" "CORE_HASH" "${CORE_HASH}"
-
-GITHUB_CORE_VERSION="$(get_remote_version pi-hole "${CORE_BRANCH}")"
-addOrEditKeyValPair "${VERSION_FILE}" "GITHUB_CORE_VERSION" "${GITHUB_CORE_VERSION}"
-
-GITHUB_CORE_HASH="$(get_remote_hash pi-hole "${CORE_BRANCH}")"
-addOrEditKeyValPair "${VERSION_FILE}" "GITHUB_CORE_HASH" "${GITHUB_CORE_HASH}"
+# get Core versions
+lookup CORE_VERSION get_local_version /etc/.pihole
+lookup CORE_HASH get_local_hash /etc/.pihole
+lookup GITHUB_CORE_VERSION cached_remote "pi-hole_${CORE_BRANCH}_version" get_remote_version pi-hole "${CORE_BRANCH}"
+lookup GITHUB_CORE_HASH cached_remote "pi-hole_${CORE_BRANCH}_hash" get_remote_hash pi-hole "${CORE_BRANCH}"
 
 # get Web versions
-
-WEB_VERSION="$(get_local_version "${ADMIN_INTERFACE_DIR}")"
-addOrEditKeyValPair "${VERSION_FILE}" "WEB_VERSION" "${WEB_VERSION}"
-
-WEB_BRANCH="$(get_local_branch "${ADMIN_INTERFACE_DIR}")"
-addOrEditKeyValPair "${VERSION_FILE}" "WEB_BRANCH" "${WEB_BRANCH}"
-
-WEB_HASH="$(get_local_hash "${ADMIN_INTERFACE_DIR}")"
-addOrEditKeyValPair "${VERSION_FILE}" "WEB_HASH" "${WEB_HASH}"
-
-GITHUB_WEB_VERSION="$(get_remote_version web "${WEB_BRANCH}")"
-addOrEditKeyValPair "${VERSION_FILE}" "GITHUB_WEB_VERSION" "${GITHUB_WEB_VERSION}"
-
-GITHUB_WEB_HASH="$(get_remote_hash web "${WEB_BRANCH}")"
-addOrEditKeyValPair "${VERSION_FILE}" "GITHUB_WEB_HASH" "${GITHUB_WEB_HASH}"
+lookup WEB_VERSION get_local_version "${ADMIN_INTERFACE_DIR}"
+lookup WEB_HASH get_local_hash "${ADMIN_INTERFACE_DIR}"
+lookup GITHUB_WEB_VERSION cached_remote "web_${WEB_BRANCH}_version" get_remote_version web "${WEB_BRANCH}"
+lookup GITHUB_WEB_HASH cached_remote "web_${WEB_BRANCH}_hash" get_remote_hash web "${WEB_BRANCH}"
 
 # get FTL versions
-
-FTL_VERSION="$(pihole-FTL version)"
-addOrEditKeyValPair "${VERSION_FILE}" "FTL_VERSION" "${FTL_VERSION}"
-
-FTL_BRANCH="$(pihole-FTL branch)"
-addOrEditKeyValPair "${VERSION_FILE}" "FTL_BRANCH" "${FTL_BRANCH}"
-
-FTL_HASH="$(pihole-FTL --hash)"
-addOrEditKeyValPair "${VERSION_FILE}" "FTL_HASH" "${FTL_HASH}"
-
-GITHUB_FTL_VERSION="$(get_remote_version FTL "${FTL_BRANCH}")"
-addOrEditKeyValPair "${VERSION_FILE}" "GITHUB_FTL_VERSION" "${GITHUB_FTL_VERSION}"
-
-GITHUB_FTL_HASH="$(get_remote_hash FTL "${FTL_BRANCH}")"
-addOrEditKeyValPair "${VERSION_FILE}" "GITHUB_FTL_HASH" "${GITHUB_FTL_HASH}"
+lookup FTL_VERSION pihole-FTL version
+lookup FTL_HASH pihole-FTL --hash
+lookup GITHUB_FTL_VERSION cached_remote "FTL_${FTL_BRANCH}_version" get_remote_version FTL "${FTL_BRANCH}"
+lookup GITHUB_FTL_HASH cached_remote "FTL_${FTL_BRANCH}_hash" get_remote_hash FTL "${FTL_BRANCH}"
 
 # get Docker versions
-
 if [[ "${DOCKER_TAG}" ]]; then
-    addOrEditKeyValPair "${VERSION_FILE}" "DOCKER_VERSION" "${DOCKER_TAG}"
-
     # Remote version check only if the tag is a valid release version
     docker_branch=""
     if [[ "${DOCKER_TAG}" =~ $release_regex ]]; then
         docker_branch="master"
     fi
 
-    GITHUB_DOCKER_VERSION="$(get_remote_version docker-pi-hole "${docker_branch}")"
-    addOrEditKeyValPair "${VERSION_FILE}" "GITHUB_DOCKER_VERSION" "${GITHUB_DOCKER_VERSION}"
+    lookup GITHUB_DOCKER_VERSION cached_remote "docker-pi-hole_${docker_branch}_version" get_remote_version docker-pi-hole "${docker_branch}"
+fi
+
+wait
+
+# Write all versions at once
+versions=()
+for key in CORE_VERSION CORE_BRANCH CORE_HASH GITHUB_CORE_VERSION GITHUB_CORE_HASH \
+           WEB_VERSION WEB_BRANCH WEB_HASH GITHUB_WEB_VERSION GITHUB_WEB_HASH \
+           FTL_VERSION FTL_BRANCH FTL_HASH GITHUB_FTL_VERSION GITHUB_FTL_HASH; do
+    versions+=("${key}=$(get_result "${key}")")
+done
+
+if [[ "${DOCKER_TAG}" ]]; then
+    versions+=("DOCKER_VERSION=${DOCKER_TAG}" "GITHUB_DOCKER_VERSION=$(get_result GITHUB_DOCKER_VERSION)")
 fi
+
+addOrEditKeyValPairs "${VERSION_FILE}" "${versions[@]}"
@@ -42,6 +42,44 @@ addOrEditKeyValPair() {
   fi
 }
 
+#######################
+# Takes a file followed by any number of key=value arguments.
+#
+# Same as addOrEditKeyValPair, but sets all given keys in one go and replaces
+# the target file atomically, so readers never see a partially written file
+#   - Existing keys keep their position in the file
+#   - New keys are appended in the given order
+#
+# Example usage:
+# addOrEditKeyValPairs "/etc/pihole/versions" "CORE_VERSION=v6.0" "CORE_BRANCH=master"
+#######################
+addOrEditKeyValPairs() {
+  local file="${1}"
+  local tmpfile
+  shift
+
+  # touch file to prevent awk error if file does not exist yet
+  touch "${file}"
+
+  # The temporary file has to be on the same file system for mv to be atomic
+  tmpfile="$(mktemp "${file}.XXXXXX")" || return 1
+
+  printf '%s\n' "$@" | awk '
+    # First input (stdin): the key=value pairs to be set
+    NR == FNR { key = substr($0, 1, index($0, "=") - 1); pair[key] = $0; order[++n] = key; next }
+    # Second input: the existing file, replace the value of known keys in place
+    { key = substr($0, 1, index($0, "=") - 1) }
+    key in pair { if (!(key in done)) print pair[key]; done[key] = 1; next }
+    { print }
+    END { for (i = 1; i <= n; i++) if (!(order[i] in done)) { print pair[order[i]]; done[order[i]] = 1 } }
+  ' - "${file}" > "${tmpfile}" || { rm -f "${tmpfile}"; return 1; }
+
+  # Keep permissions and ownership of the original file
+  chmod "$(stat -c '%a' "${file}")" "${tmpfile}"
+  chown "$(stat -c '%u:%g' "${file}")" "${tmpfile}" 2>/dev/null
+  mv -f "${tmpfile}" "${file}"
+}
+
 #######################
 # returns FTL's PID based on the content of the pihole-FTL.pid file
 #
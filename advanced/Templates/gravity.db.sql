@@ -38,6 +38,10 @@ CREATE TABLE adlist
     status INTEGER NOT NULL DEFAULT 0,
     abp_entries INTEGER NOT NULL DEFAULT 0,
     type INTEGER NOT NULL DEFAULT 0,
+    refresh_interval INTEGER NOT NULL DEFAULT 0,
+    next_update INTEGER,
+    etag TEXT,
+    last_modified TEXT,
     UNIQUE(address, type)
 );
 
@@ -60,13 +64,38 @@ CREATE TABLE antigravity
     adlist_id INTEGER NOT NULL REFERENCES adlist (id)
 );
 
+/* Effective blocklist of every group (gravity and denylist minus antigravity
+   and allowlist), only filled when enabled with 'pihole -g --by-group'.
+   ABP-style allow entries (||example.com^) also remove all subdomains, regex
+   allow filters are not applied. ABP-style gravity entries are kept as they
+   are and still cover their subdomains */
+CREATE TABLE gravity_by_group
+(
+    group_id INTEGER NOT NULL,
+    domain TEXT NOT NULL,
+    PRIMARY KEY (group_id, domain)
+) WITHOUT ROWID;
+
+/* Cost of the regex filters measured by 'pihole -g --profile-regex'
+    cost = nanoseconds per domain of the sample
+    status: 0 = ok, 1 = slow, 2 = timed out, 3 = invalid */
+CREATE TABLE regex_profile
+(
+    domainlist_id INTEGER NOT NULL REFERENCES domainlist (id) ON DELETE CASCADE,
+    timestamp INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    cost INTEGER NOT NULL,
+    status INTEGER NOT NULL,
+    PRIMARY KEY (domainlist_id, timestamp)
+);
+
 CREATE TABLE info
 (
     property TEXT PRIMARY KEY,
     value TEXT NOT NULL
 );
 
-INSERT INTO "info" VALUES('version','20');
+INSERT INTO "info" VALUES('version','23');
 /* This is a flag to indicate if gravity was restored from a backup
     false = not restored,
     failed = restoration failed due to no backup
@@ -99,6 +128,7 @@ CREATE TABLE client_by_group
 CREATE TRIGGER tr_adlist_update AFTER UPDATE OF address,enabled,comment ON adlist
     BEGIN
       UPDATE adlist SET date_modified = (cast(strftime('%s', 'now') as int)) WHERE id = NEW.id;
+      UPDATE info SET value = 'stale' WHERE property = 'gravity_by_group';
     END;
 
 CREATE TRIGGER tr_client_update AFTER UPDATE ON client
@@ -109,6 +139,7 @@ CREATE TRIGGER tr_client_update AFTER UPDATE ON client
 CREATE TRIGGER tr_domainlist_update AFTER UPDATE ON domainlist
     BEGIN
       UPDATE domainlist SET date_modified = (cast(strftime('%s', 'now') as int)) WHERE domain = NEW.domain;
+      UPDATE info SET value = 'stale' WHERE property = 'gravity_by_group';
     END;
 
 CREATE VIEW vw_allowlist AS SELECT domain, domainlist.id AS id, domainlist_by_group.group_id AS group_id
@@ -177,9 +208,30 @@ CREATE TRIGGER tr_adlist_add AFTER INSERT ON adlist
       INSERT INTO adlist_by_group (adlist_id, group_id) VALUES (NEW.id, 0);
     END;
 
+CREATE TRIGGER tr_adlist_by_group_add AFTER INSERT ON adlist_by_group
+    BEGIN
+      UPDATE info SET value = 'stale' WHERE property = 'gravity_by_group';
+    END;
+
+CREATE TRIGGER tr_adlist_by_group_delete AFTER DELETE ON adlist_by_group
+    BEGIN
+      UPDATE info SET value = 'stale' WHERE property = 'gravity_by_group';
+    END;
+
+CREATE TRIGGER tr_domainlist_by_group_add AFTER INSERT ON domainlist_by_group
+    BEGIN
+      UPDATE info SET value = 'stale' WHERE property = 'gravity_by_group';
+    END;
+
+CREATE TRIGGER tr_domainlist_by_group_delete AFTER DELETE ON domainlist_by_group
+    BEGIN
+      UPDATE info SET value = 'stale' WHERE property = 'gravity_by_group';
+    END;
+
 CREATE TRIGGER tr_group_update AFTER UPDATE ON "group"
     BEGIN
       UPDATE "group" SET date_modified = (cast(strftime('%s', 'now') as int)) WHERE id = NEW.id;
+      UPDATE info SET value = 'stale' WHERE property = 'gravity_by_group';
     END;
 
 CREATE TRIGGER tr_group_zero AFTER DELETE ON "group"
@@ -22,6 +22,8 @@ INSERT OR REPLACE INTO client SELECT * FROM OLD.client;
 DELETE FROM OLD.client_by_group WHERE client_id NOT IN (SELECT id FROM OLD.client);
 INSERT OR REPLACE INTO client_by_group SELECT * FROM OLD.client_by_group;
 
+INSERT OR REPLACE INTO regex_profile SELECT * FROM OLD.regex_profile WHERE domainlist_id IN (SELECT id FROM OLD.domainlist);
+
 
 CREATE TRIGGER tr_domainlist_add AFTER INSERT ON domainlist
     BEGIN
@@ -7,32 +7,44 @@ utilsfile="${PI_HOLE_SCRIPT_DIR}/utils.sh"
 . "${utilsfile}"
 
 # Get file paths
-FTL_PID_FILE="$(getFTLConfigValue files.pid)"
-FTL_LOG_FILE="$(getFTLConfigValue files.log.ftl)"
-PIHOLE_LOG_FILE="$(getFTLConfigValue files.log.dnsmasq)"
-WEBSERVER_LOG_FILE="$(getFTLConfigValue files.log.webserver)"
+# Query them concurrently as every call starts a new pihole-FTL process
+CONFIG_TMPDIR="$(mktemp -d)"
+getFTLConfigValue files.pid > "${CONFIG_TMPDIR}/pid" &
+getFTLConfigValue files.log.ftl > "${CONFIG_TMPDIR}/ftl" &
+getFTLConfigValue files.log.dnsmasq > "${CONFIG_TMPDIR}/dnsmasq" &
+getFTLConfigValue files.log.webserver > "${CONFIG_TMPDIR}/webserver" &
+wait
+FTL_PID_FILE="$(cat "${CONFIG_TMPDIR}/pid")"
+FTL_LOG_FILE="$(cat "${CONFIG_TMPDIR}/ftl")"
+PIHOLE_LOG_FILE="$(cat "${CONFIG_TMPDIR}/dnsmasq")"
+WEBSERVER_LOG_FILE="$(cat "${CONFIG_TMPDIR}/webserver")"
+rm -rf "${CONFIG_TMPDIR}"
 FTL_PID_FILE="${FTL_PID_FILE:-/run/pihole-FTL.pid}"
 FTL_LOG_FILE="${FTL_LOG_FILE:-/var/log/pihole/FTL.log}"
 PIHOLE_LOG_FILE="${PIHOLE_LOG_FILE:-/var/log/pihole/pihole.log}"
 WEBSERVER_LOG_FILE="${WEBSERVER_LOG_FILE:-/var/log/pihole/webserver.log}"
 
 # Ensure that permissions are set so that pihole-FTL can edit all necessary files
+# Only entries which do not already have the expected owner and mode are
+# changed. On a restart this is usually none of them, so we avoid rewriting the
+# metadata of every list cache file, rotated log and gravity backup
 mkdir -p /var/log/pihole
-chown -R pihole:pihole /etc/pihole/ /var/log/pihole/
-
-# allow all users read version file (and use pihole -v)
 touch /etc/pihole/versions
-chmod 0644 /etc/pihole/versions
+
+# chown -h changes symlinks themselves, not their targets (e.g. certificates
+# linked from outside of /etc/pihole), the same way chown -R does
+find /etc/pihole/ /var/log/pihole/ ! -path /etc/pihole/logrotate \( ! -user pihole -o ! -group pihole \) -exec chown -h pihole:pihole {} +
+# Logrotate config file need to be owned by root
+find /etc/pihole/logrotate \( ! -user root -o ! -group root \) -exec chown -h root:root {} + 2>/dev/null
 
 # allow pihole to access subdirs in /etc/pihole (sets execution bit on dirs)
-find /etc/pihole/ /var/log/pihole/ -type d -exec chmod 0755 {} +
-# Set all files (except TLS-related ones) to u+rw g+r
-find /etc/pihole/ /var/log/pihole/ -type f ! \( -name '*.pem' -o -name '*.crt' \) -exec chmod 0640 {} +
+find /etc/pihole/ /var/log/pihole/ -type d ! -perm 0755 -exec chmod 0755 {} +
+# Set all files (except TLS-related ones and the version file) to u+rw g+r
+find /etc/pihole/ /var/log/pihole/ -type f ! \( -name '*.pem' -o -name '*.crt' -o -path /etc/pihole/versions \) ! -perm 0640 -exec chmod 0640 {} +
 # Set TLS-related files to a more restrictive u+rw *only* (they may contain private keys)
-find /etc/pihole/ -type f \( -name '*.pem' -o -name '*.crt' \) -exec chmod 0600 {} +
-
-# Logrotate config file need to be owned by root
-chown root:root /etc/pihole/logrotate
+find /etc/pihole/ -type f \( -name '*.pem' -o -name '*.crt' \) ! -perm 0600 -exec chmod 0600 {} +
+# allow all users read version file (and use pihole -v)
+chmod 0644 /etc/pihole/versions
 
 # Touch files to ensure they exist (create if non-existing, preserve if existing)
 [ -f "${FTL_PID_FILE}" ] || install -D -m 644 -o pihole -g pihole /dev/null "${FTL_PID_FILE}"
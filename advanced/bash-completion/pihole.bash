@@ -3,7 +3,7 @@
 # Bash completion script for pihole
 #
 _pihole() {
-    local cur prev prev2 opts opts_lists opts_checkout opts_debug opts_logging opts_query opts_update opts_networkflush
+    local cur prev prev2 opts opts_lists opts_checkout opts_debug opts_logging opts_query opts_update opts_networkflush opts_db
     COMPREPLY=()
     cur="${COMP_WORDS[COMP_CWORD]}"
     prev="${COMP_WORDS[COMP_CWORD-1]}"
@@ -11,7 +11,7 @@ _pihole() {
 
     case "${prev}" in
         "pihole")
-            opts="allow allow-regex allow-wild deny checkout debug disable enable flush help logging query repair regex reloaddns reloadlists setpassword status tail uninstall updateGravity updatePihole version wildcard networkflush api"
+            opts="allow allow-regex allow-wild db deny checkout debug disable enable flush help logging query repair regex reloaddns reloadlists setpassword status tail uninstall updateGravity updatePihole version wildcard networkflush api"
             mapfile -t COMPREPLY < <(compgen -W "${opts}" -- "${cur}")
         ;;
         "allow"|"deny"|"wildcard"|"regex"|"allow-regex"|"allow-wild")
@@ -31,7 +31,7 @@ _pihole() {
             mapfile -t COMPREPLY < <(compgen -W "${opts_logging}" -- "${cur}")
         ;;
         "query")
-            opts_query="--partial --all"
+            opts_query="--partial --all --offline"
             mapfile -t COMPREPLY < <(compgen -W "${opts_query}" -- "${cur}")
         ;;
         "updatePihole"|"-up")
@@ -42,6 +42,14 @@ _pihole() {
             opts_networkflush="--arp"
             mapfile -t COMPREPLY < <(compgen -W "${opts_networkflush}" -- "${cur}")
         ;;
+        "db")
+            opts_db="maintain"
+            mapfile -t COMPREPLY < <(compgen -W "${opts_db}" -- "${cur}")
+        ;;
+        "maintain")
+            opts_db="--budget --days --enable-incremental-vacuum --help"
+            mapfile -t COMPREPLY < <(compgen -W "${opts_db}" -- "${cur}")
+        ;;
         "core"|"web"|"ftl")
             if [[ "$prev2" == "checkout" ]]; then
                 opts_checkout="master development"
@@ -79,9 +79,10 @@ webroot="/var/www/html"
 # Pi-hole contains various setup scripts and files which are critical to the installation.
 # Search for "PI_HOLE_LOCAL_REPO" in this file to see all such scripts.
 # Two notable scripts are gravity.sh (used to generate the HOSTS file) and advanced/Scripts/webpage.sh (used to install the Web admin interface)
-webInterfaceGitUrl="https://github.com/pi-hole/web.git"
+# Both URLs can be overridden to install from a mirror or a local repository
+webInterfaceGitUrl="${PIHOLE_WEB_GIT_URL:-https://github.com/pi-hole/web.git}"
 webInterfaceDir="${webroot}/admin"
-piholeGitUrl="https://github.com/pi-hole/pi-hole.git"
+piholeGitUrl="${PIHOLE_GIT_URL:-https://github.com/pi-hole/pi-hole.git}"
 PI_HOLE_LOCAL_REPO="/etc/.pihole"
 # List of pihole scripts, stored in an array
 PI_HOLE_FILES=(list piholeDebug piholeLogFlush setupLCD update version gravity uninstall webpage)
@@ -90,6 +91,14 @@ PI_HOLE_INSTALL_DIR="/opt/pihole"
 PI_HOLE_CONFIG_DIR="/etc/pihole"
 PI_HOLE_BIN_DIR="/usr/local/bin"
 PI_HOLE_V6_CONFIG="${PI_HOLE_CONFIG_DIR}/pihole.toml"
+# Downloaded FTL binaries are kept here so repair and update runs do not have to
+# download the same binary again. They are verified against the remote checksum
+# every time before they are installed
+PI_HOLE_CACHE_DIR="${PIHOLE_CACHE_DIR:-/var/cache/pihole}"
+# FTL binaries and the MAC vendor database are downloaded from GitHub and
+# ftl.pi-hole.net unless a mirror is set. A mirror has to provide the layout of
+# ftl.pi-hole.net: <branch>/<binary>, <branch>/<binary>.sha1 and macvendor.db
+ftlMirrorUrl="${PIHOLE_MIRROR%/}"
 fresh_install=true
 
 adlistFile="/etc/pihole/adlists.list"
@@ -1720,7 +1729,7 @@ checkSelinux() {
 check_download_exists() {
     # Check if the download exists and we can reach the server
     local status
-    status=$(curl --head --silent "https://ftl.pi-hole.net/${1}" | head -n 1)
+    status=$(curl --head --silent "${ftlMirrorUrl:-https://ftl.pi-hole.net}/${1}" | head -n 1)
 
     # Check the status code
     if grep -q "200" <<<"${status}"; then
@@ -1804,6 +1813,40 @@ checkout_pull_branch() {
     return 0
 }
 
+# Base URL to download the FTL binaries of the given branch from
+ftl_download_url() {
+    local ftlBranch="${1}"
+
+    if [[ -n "${ftlMirrorUrl}" ]]; then
+        echo "${ftlMirrorUrl}/${ftlBranch}"
+    elif [[ "${ftlBranch}" == "master" ]]; then
+        echo "https://github.com/pi-hole/ftl/releases/latest/download"
+    else
+        echo "https://ftl.pi-hole.net/${ftlBranch}"
+    fi
+}
+
+# Download the MAC vendor database, but only if it changed since the local copy
+# was downloaded. The existing file is only replaced after a complete download
+fetch_macvendor_db() {
+    local target="${PI_HOLE_CONFIG_DIR}/macvendor.db"
+    local condition=()
+
+    if [[ -s "${target}" ]]; then
+        condition=(--time-cond "${target}")
+    fi
+    curl -sSL --fail --remote-time "${condition[@]}" "${ftlMirrorUrl:-https://ftl.pi-hole.net}/macvendor.db" -o "${target}.part" || {
+        rm -f "${target}.part"
+        return 1
+    }
+    # Nothing is written if the local copy is still up to date
+    if [[ -s "${target}.part" ]]; then
+        mv -f "${target}.part" "${target}"
+    else
+        rm -f "${target}.part"
+    fi
+}
+
 clone_or_reset_repos() {
     # If the user wants to repair/update,
     if [[ "${repair}" == true ]]; then
@@ -1823,13 +1866,13 @@ clone_or_reset_repos() {
     # Otherwise, a fresh installation is happening
     else
         # so get git files for Core
-        getGitFiles ${PI_HOLE_LOCAL_REPO} ${piholeGitUrl} ||
+        getGitFiles "${PI_HOLE_LOCAL_REPO}" "${piholeGitUrl}" ||
             {
                 printf "  %b Unable to clone %s into %s, unable to continue%b\\n" "${COL_RED}" "${piholeGitUrl}" "${PI_HOLE_LOCAL_REPO}" "${COL_NC}"
                 exit 1
             }
         # get the Web git files
-        getGitFiles ${webInterfaceDir} ${webInterfaceGitUrl} ||
+        getGitFiles "${webInterfaceDir}" "${webInterfaceGitUrl}" ||
             {
                 printf "  %b Unable to clone %s into ${webInterfaceDir}, exiting installer%b\\n" "${COL_RED}" "${webInterfaceGitUrl}" "${COL_NC}"
                 exit 1
@@ -1837,20 +1880,13 @@ clone_or_reset_repos() {
     fi
 }
 
-# Download FTL binary to random temp directory and install FTL binary
+# Download FTL binary into the cache (unless a valid copy is already there) and install FTL binary
 # Disable directive for SC2120 a value _can_ be passed to this function, but it is passed from an external script that sources this one
 FTLinstall() {
     # Local, named variables
     local str="Downloading and Installing FTL"
     printf "  %b %s..." "${INFO}" "${str}"
 
-    # Move into the temp ftl directory
-    pushd "$(mktemp -d)" >/dev/null || {
-        printf "Unable to make temporary directory for FTL binary download\\n"
-        return 1
-    }
-    local tempdir
-    tempdir="$(pwd)"
     local ftlBranch
     local url
 
@@ -1864,79 +1900,70 @@ FTLinstall() {
     binary="${1}"
 
     # Determine which version of FTL to download
-    if [[ "${ftlBranch}" == "master" ]]; then
-        url="https://github.com/pi-hole/ftl/releases/latest/download"
-    else
-        url="https://ftl.pi-hole.net/${ftlBranch}"
-    fi
-
-    if curl -sSL --fail "${url}/${binary}" -o "${binary}"; then
-        # If the download worked, get sha1 of the binary we just downloaded for verification.
-        curl -sSL --fail "${url}/${binary}.sha1" -o "${binary}.sha1"
-
-        # If we downloaded binary file (as opposed to text),
-        if sha1sum --status --quiet -c "${binary}".sha1; then
-            printf "transferred... "
-
-            # Before stopping FTL, we download the macvendor database
-            curl -sSL "https://ftl.pi-hole.net/macvendor.db" -o "${PI_HOLE_CONFIG_DIR}/macvendor.db" || true
-
-
-            # If the binary already exists in /usr/bin, then we need to stop the service
-            # If the binary does not exist (fresh installs), then we can skip this step.
-            if [[ -f /usr/bin/pihole-FTL ]]; then
-                stop_service pihole-FTL >/dev/null
-            fi
+    url="$(ftl_download_url "${ftlBranch}")"
 
-            # Install the new version with the correct permissions
-            install -T -m 0755 "${binary}" /usr/bin/pihole-FTL
+    install -d -m 0755 "${PI_HOLE_CACHE_DIR}" || {
+        printf "Unable to create cache directory %s for FTL binary download\\n" "${PI_HOLE_CACHE_DIR}"
+        return 1
+    }
+    local cachedBinary="${PI_HOLE_CACHE_DIR}/${binary}"
 
-            # Move back into the original directory the user was in
-            popd >/dev/null || {
-                printf "Unable to return to original directory after FTL binary download.\\n"
-                return 1
-            }
+    # The MAC vendor database does not depend on the binary, download it in
+    # the background while we take care of FTL
+    fetch_macvendor_db &
+    local macvendorPid=$!
 
-            # Installed the FTL service
-            printf "%b  %b %s\\n" "${OVER}" "${TICK}" "${str}"
+    # Reuse the checksum if FTLcheckUpdate already downloaded it during this run
+    local remoteSha1="${ftlRemoteSha1}"
+    if [[ ! "${remoteSha1}" =~ ^[a-f0-9]{40}$ ]]; then
+        remoteSha1=$(curl -sSL --fail "${url}/${binary}.sha1" | cut -d ' ' -f 1 || true)
+    fi
 
-            # Remove temp dir
-            remove_dir "${tempdir}"
+    local cachedSha1=""
+    if [[ -f "${cachedBinary}" ]]; then
+        cachedSha1=$(sha1sum "${cachedBinary}" | cut -d ' ' -f 1)
+    fi
 
-            return 0
-        else
-            # Otherwise, the hash download failed, so print and exit.
-            popd >/dev/null || {
-                printf "Unable to return to original directory after FTL binary download.\\n"
-                return 1
-            }
+    if [[ "${remoteSha1}" =~ ^[a-f0-9]{40}$ ]] && [[ "${cachedSha1}" == "${remoteSha1}" ]]; then
+        # The binary was downloaded by an earlier run and is still up to date
+        printf "cached... "
+    elif curl -sSL --fail "${url}/${binary}" -o "${cachedBinary}.part"; then
+        # Only keep the download if it matches the checksum, otherwise print and exit.
+        if [[ ! "${remoteSha1}" =~ ^[a-f0-9]{40}$ ]] || [[ "$(sha1sum "${cachedBinary}.part" | cut -d ' ' -f 1)" != "${remoteSha1}" ]]; then
+            rm -f "${cachedBinary}.part"
+            wait "${macvendorPid}" || true
             printf "%b  %b %s\\n" "${OVER}" "${CROSS}" "${str}"
             printf "  %b Error: Download of %s/%s failed (checksum error)%b\\n" "${COL_RED}" "${url}" "${binary}" "${COL_NC}"
-
-            # Remove temp dir
-            remove_dir "${tempdir}"
             return 1
         fi
+        mv -f "${cachedBinary}.part" "${cachedBinary}"
+        printf "transferred... "
     else
         # Otherwise, the download failed, so print and exit.
-        popd >/dev/null || {
-            printf "Unable to return to original directory after FTL binary download.\\n"
-            return 1
-        }
+        rm -f "${cachedBinary}.part"
+        wait "${macvendorPid}" || true
         printf "%b  %b %s\\n" "${OVER}" "${CROSS}" "${str}"
         # The URL could not be found
         printf "  %b Error: URL %s/%s not found%b\\n" "${COL_RED}" "${url}" "${binary}" "${COL_NC}"
-
-        # Remove temp dir
-        remove_dir "${tempdir}"
         return 1
     fi
-}
 
-remove_dir() {
-    # Delete dir
-    rm -r "${1}" >/dev/null 2>&1 ||
-        echo -e "  ${CROSS} Unable to remove ${1}"
+    # Before stopping FTL, we wait for the macvendor database
+    wait "${macvendorPid}" || true
+
+    # If the binary already exists in /usr/bin, then we need to stop the service
+    # If the binary does not exist (fresh installs), then we can skip this step.
+    if [[ -f /usr/bin/pihole-FTL ]]; then
+        stop_service pihole-FTL >/dev/null
+    fi
+
+    # Install the new version with the correct permissions
+    install -T -m 0755 "${cachedBinary}" /usr/bin/pihole-FTL
+
+    # Installed the FTL service
+    printf "%b  %b %s\\n" "${OVER}" "${TICK}" "${str}"
+
+    return 0
 }
 
 get_binary_name() {
@@ -2033,8 +2060,12 @@ FTLcheckUpdate() {
 
     local remoteSha1
     local localSha1
+    # Remote checksum for FTLinstall, so it does not have to download it again
+    ftlRemoteSha1=""
 
-    if [[ "${ftlBranch}" != "master" ]]; then
+    # Release metadata is only available from GitHub, binaries from a mirror
+    # are verified by their checksum only, the same way as branches are
+    if [[ "${ftlBranch}" != "master" ]] || [[ -n "${ftlMirrorUrl}" ]]; then
         # This is not the master branch
         local path
         path="${ftlBranch}/${binary}"
@@ -2047,7 +2078,7 @@ FTLcheckUpdate() {
                 printf "  %b Branch \"%s\" is not available.\\n" "${INFO}" "${ftlBranch}"
                 printf "  %b Use %bpihole checkout ftl [branchname]%b to switch to a valid branch.\\n" "${INFO}" "${COL_GREEN}" "${COL_NC}"
             elif [ "${status}" -eq 2 ]; then
-                printf "  %b Unable to download from ftl.pi-hole.net. Please check your Internet connection and try again later.\\n" "${CROSS}"
+                printf "  %b Unable to download from %s. Please check your Internet connection and try again later.\\n" "${CROSS}" "${ftlMirrorUrl:-ftl.pi-hole.net}"
                 return 3
             else
                 printf "  %b Unknown error. Please contact Pi-hole Support\\n" "${CROSS}"
@@ -2062,7 +2093,7 @@ FTLcheckUpdate() {
             # confirm the checksum of the local vs remote to decide whether we
             # download or not
             printf "  %b FTL binary already installed, verifying integrity...\\n" "${INFO}"
-            checkSumFile="https://ftl.pi-hole.net/${ftlBranch}/${binary}.sha1"
+            checkSumFile="$(ftl_download_url "${ftlBranch}")/${binary}.sha1"
             # Continue further down...
         else
             return 0
@@ -2116,6 +2147,7 @@ FTLcheckUpdate() {
         return 0
     elif [[ "${remoteSha1}" != "${localSha1}" ]]; then
         printf "  %b Remote binary is different, downloading...\\n" "${CROSS}"
+        ftlRemoteSha1="${remoteSha1}"
         return 0
     fi
 
@@ -2458,7 +2490,7 @@ main() {
     runGravity
 
     # Update local and remote versions via updatechecker
-    /opt/pihole/updatecheck.sh
+    /opt/pihole/updatecheck.sh --no-cache
 
     if [[ "${fresh_install}" == true ]]; then
 
@@ -131,6 +131,7 @@ removePiholeFiles() {
     rm -rf "${PI_HOLE_CONFIG_DIR:-/etc/pihole}" &> /dev/null
     rm -rf "${PI_HOLE_LOCAL_REPO:-/etc/.pihole}" &> /dev/null
     rm -rf "${PI_HOLE_INSTALL_DIR:-/opt/pihole}" &> /dev/null
+    rm -rf "${PI_HOLE_CACHE_DIR:-/var/cache/pihole}" &> /dev/null
 
     # Remove log files (including user specified non-default paths)
     # and rotated logs
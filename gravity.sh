@@ -47,6 +47,38 @@ gravityDBcopy="${piholeGitDir}/advanced/Templates/gravity_copy.sql"
 domainsExtension="domains"
 curl_connect_timeout=10
 etag_support=false
+# Bounds (in seconds) for the refresh interval of a single adlist derived from
+# its HTTP caching headers, see gravity_ScheduleAdlist. Many list hosts send
+# short max-age values (e.g. five minutes), so the lower bound is kept at one
+# day; only a refresh_interval configured for the adlist can be shorter
+refresh_min_interval=86400
+refresh_max_interval=604800
+# Regex profiling, see gravity_ProfileRegex: number of domains drawn from
+# gravity and from recent queries each, time (in seconds) after which a regex
+# is considered catastrophic and the factor above the median cost of all regex
+# filters (with a minimum in nanoseconds per domain) which counts as slow
+regex_sample_size=5000
+regex_timeout=10
+regex_slow_factor=10
+regex_slow_min_cost=1000
+# Governed mode (--governed), see gravity_Govern. The defaults can be
+# overridden from the environment, e.g. in the cron entry
+#  - CPU (nice) and I/O (ionice best-effort level) priority of the whole run
+#  - memory (in KiB) SQLite may use for its page cache and sorting
+#  - share of the time (in percent) spent on heavy steps, the rest is paused
+#  - latency (in ms) of the local resolver above which the build waits
+#  - interval (in seconds) between two latency probes. Every probe is a real
+#    query for pi.hole and shows up in the query log
+GRAVITY_NICE="${GRAVITY_NICE:-19}"
+GRAVITY_IONICE="${GRAVITY_IONICE:-7}"
+GRAVITY_MEMORY="${GRAVITY_MEMORY:-16384}"
+GRAVITY_DUTY_CYCLE="${GRAVITY_DUTY_CYCLE:-50}"
+GRAVITY_LATENCY_TARGET="${GRAVITY_LATENCY_TARGET:-50}"
+GRAVITY_PROBE_INTERVAL="${GRAVITY_PROBE_INTERVAL:-10}"
+# Longest time (in seconds) to wait for the resolver to recover per step
+governed_max_wait=60
+# Statements prepended to heavy SQLite work, set in governed mode
+sqlitePragmas=""
 
 # Check gravity temp directory
 if [ ! -d "${GRAVITY_TMPDIR}" ] || [ ! -w "${GRAVITY_TMPDIR}" ]; then
@@ -61,8 +93,10 @@ gravityDBfile_default="${piholeDir}/gravity.db"
 gravityTEMPfile="${GRAVITYDB}_temp"
 gravityDIR="$(dirname -- "${gravityDBfile}")"
 gravityOLDfile="${gravityDIR}/gravity_old.db"
+gravityPARTIALfile="${GRAVITYDB}_partial"
 gravityBCKdir="${gravityDIR}/gravity_backups"
 gravityBCKfile="${gravityBCKdir}/gravity.db"
+gravityLOCKfile="${gravityDIR}/gravity.lock"
 
 fix_owner_permissions() {
   # Fix ownership and permissions for the specified file
@@ -91,7 +125,7 @@ gravity_build_tree() {
   echo -ne "  ${INFO} ${str}..."
 
   # The index is intentionally not UNIQUE as poor quality adlists may contain domains more than once
-  output=$({ pihole-FTL sqlite3 -ni "${gravityTEMPfile}" "CREATE INDEX idx_gravity ON gravity (domain, adlist_id);"; } 2>&1)
+  output=$({ pihole-FTL sqlite3 -ni "${gravityTEMPfile}" "${sqlitePragmas}CREATE INDEX idx_gravity ON gravity (domain, adlist_id);"; } 2>&1)
   status="$?"
 
   if [[ "${status}" -ne 0 ]]; then
@@ -102,6 +136,74 @@ gravity_build_tree() {
   echo -e "${OVER}  ${TICK} ${str}"
 }
 
+# Returns success if the per-group blocklist is maintained. This is enabled
+# with --by-group and remembered in the info table of the gravity database
+gravity_GroupTableEnabled() {
+  if [[ -n "${groupTable:-}" ]]; then
+    [[ "${groupTable}" == true ]]
+    return
+  fi
+  [[ -n "$(pihole-FTL sqlite3 -ni "${gravityDBfile}" "SELECT value FROM info WHERE property = 'gravity_by_group';" 2>/dev/null)" ]]
+}
+
+# Materialize the effective blocklist of every group into gravity_by_group so
+# it can be looked up by (group_id, domain) without joining the adlist and
+# group tables. Antigravity is subtracted from gravity, the denylist added and
+# the allowlist subtracted, in the order FTL applies them. Regex filters are
+# not taken into account. Changes of groups, lists or the domainlist mark the
+# table as stale (see the triggers in gravity.db.sql) until it is rebuilt
+# Takes one argument: the gravity database to work on
+gravity_build_group_table() {
+  local database="${1}" str abpRemove
+  if ! gravity_GroupTableEnabled; then
+    if [[ "${groupTable:-}" == false ]]; then
+      pihole-FTL sqlite3 -ni "${database}" "DELETE FROM gravity_by_group; DELETE FROM info WHERE property = 'gravity_by_group';"
+    fi
+    return 0
+  fi
+
+  # ABP-style allow entries (||example.com^) cover the domain and all of its
+  # subdomains. Every remaining entry is compared by each of its parent domains
+  # against the entries collected in temp.abp_allow. Only done for groups with
+  # such entries, exact entries are removed on literal equality
+  abpRemove="DELETE FROM gravity_by_group WHERE (group_id, domain) IN (
+  WITH RECURSIVE parent(group_id, domain, suffix) AS (
+    SELECT group_id, domain, CASE WHEN domain LIKE '||%^' THEN substr(domain, 3, length(domain) - 3) ELSE domain END
+      FROM gravity_by_group WHERE group_id IN (SELECT group_id FROM temp.abp_allow)
+    UNION ALL
+    SELECT group_id, domain, substr(suffix, instr(suffix, '.') + 1) FROM parent WHERE instr(suffix, '.') > 0)
+  SELECT p.group_id, p.domain FROM parent AS p JOIN temp.abp_allow AS a ON a.group_id = p.group_id AND a.base = p.suffix);
+DELETE FROM temp.abp_allow;"
+
+  str="Building per-group blocklist"
+  echo -ne "  ${INFO} ${str}..."
+  output=$({ pihole-FTL sqlite3 -ni "${database}" <<EOT
+.timeout 30000
+${sqlitePragmas}
+CREATE TEMP TABLE abp_allow (group_id INTEGER NOT NULL, base TEXT NOT NULL, PRIMARY KEY (group_id, base)) WITHOUT ROWID;
+BEGIN TRANSACTION;
+DELETE FROM gravity_by_group;
+INSERT OR IGNORE INTO gravity_by_group (group_id, domain) SELECT group_id, domain FROM vw_gravity WHERE group_id IS NOT NULL ORDER BY group_id, domain;
+DELETE FROM gravity_by_group WHERE (group_id, domain) IN (SELECT group_id, domain FROM vw_antigravity WHERE group_id IS NOT NULL);
+INSERT OR IGNORE INTO temp.abp_allow SELECT group_id, substr(domain, 3, length(domain) - 3) FROM vw_antigravity WHERE group_id IS NOT NULL AND domain LIKE '||%^';
+${abpRemove}
+INSERT OR IGNORE INTO gravity_by_group (group_id, domain) SELECT group_id, domain FROM vw_denylist WHERE group_id IS NOT NULL;
+DELETE FROM gravity_by_group WHERE (group_id, domain) IN (SELECT group_id, domain FROM vw_allowlist WHERE group_id IS NOT NULL);
+INSERT OR IGNORE INTO temp.abp_allow SELECT group_id, substr(domain, 3, length(domain) - 3) FROM vw_allowlist WHERE group_id IS NOT NULL AND domain LIKE '||%^';
+${abpRemove}
+INSERT OR REPLACE INTO info (property, value) VALUES ('gravity_by_group', 'current');
+COMMIT;
+EOT
+  } 2>&1)
+  status="$?"
+
+  if [[ "${status}" -ne 0 ]]; then
+    echo -e "\n  ${CROSS} Unable to build per-group blocklist in ${database}\n  ${output}"
+    return 1
+  fi
+  echo -e "${OVER}  ${TICK} ${str}"
+}
+
 # Rotate gravity backup files
 rotate_gravity_backup() {
   for i in {9..1}; do
@@ -134,7 +236,7 @@ gravity_swap_databases() {
 
   # Drop the gravity and antigravity tables + subsequent VACUUM the current
   # database for compaction
-  output=$({ printf ".timeout 30000\\nDROP TABLE IF EXISTS gravity;\\nDROP TABLE IF EXISTS antigravity;\\nVACUUM;\\n" | pihole-FTL sqlite3 -ni "${gravityDBfile}"; } 2>&1)
+  output=$({ printf ".timeout 30000\\n%sDROP TABLE IF EXISTS gravity;\\nDROP TABLE IF EXISTS antigravity;\\nVACUUM;\\n" "${sqlitePragmas}" | pihole-FTL sqlite3 -ni "${gravityDBfile}"; } 2>&1)
   status="$?"
 
   if [[ "${status}" -ne 0 ]]; then
@@ -296,6 +398,80 @@ database_adlist_status() {
   fi
 }
 
+# Print the value of header ${2} of the last response stored in file ${1}
+# (earlier responses in the file are redirects)
+gravity_GetHeader() {
+  awk -v name="${2}" '
+    { sub(/\r$/, "") }
+    tolower($0) ~ /^http\// { value = "" }
+    tolower(substr($0, 1, length(name) + 1)) == tolower(name) ":" {
+      value = substr($0, length(name) + 2)
+      sub(/^[ \t]+/, "", value)
+    }
+    END { print value }' "${1}" 2>/dev/null
+}
+
+# Determine when this list is due for its next refresh. A refresh interval set
+# for the adlist takes precedence over the caching headers sent by the server
+# (Cache-Control: max-age, then Expires). Lists that could not be downloaded
+# are retried after the minimal interval
+gravity_ScheduleAdlist() {
+  local adlistID="${1}" saveLocation="${2}" headers="${3}" downloaded="${4}"
+  local now configured interval cache_control expires etag last_modified
+
+  # Only try to schedule when these fields exist in the gravity database
+  if ! gravity_column_exists "adlist" "next_update"; then
+    return
+  fi
+
+  now="$(date +%s)"
+  configured="$(pihole-FTL sqlite3 -ni "${gravityTEMPfile}" "SELECT refresh_interval FROM adlist WHERE id = ${adlistID};")"
+
+  if [[ -s "${headers}" ]]; then
+    cache_control="$(gravity_GetHeader "${headers}" "Cache-Control")"
+    expires="$(gravity_GetHeader "${headers}" "Expires")"
+    etag="$(gravity_GetHeader "${headers}" "ETag")"
+    last_modified="$(gravity_GetHeader "${headers}" "Last-Modified")"
+  fi
+  # curl keeps the ETag of the last successful download in its own file
+  if [[ -z "${etag}" && -s "${saveLocation}.etag" ]]; then
+    etag="$(<"${saveLocation}.etag")"
+  fi
+
+  if [[ "${configured}" -gt 0 ]]; then
+    # A configured interval is used as is
+    interval="${configured}"
+  elif [[ "${downloaded}" != true ]]; then
+    interval="${refresh_min_interval}"
+  elif [[ "${cache_control}" =~ (no-cache|no-store) ]]; then
+    interval=0
+  elif [[ "${cache_control}" =~ max-age=([0-9]+) ]]; then
+    interval="${BASH_REMATCH[1]}"
+  elif [[ -n "${expires}" ]] && expires="$(date -d "${expires}" +%s 2>/dev/null)"; then
+    interval=$((expires - now))
+  else
+    interval="${refresh_max_interval}"
+  fi
+
+  # Keep the interval suggested by the server within sensible bounds
+  if [[ "${configured}" -le 0 ]]; then
+    if [[ "${interval}" -lt "${refresh_min_interval}" ]]; then
+      interval="${refresh_min_interval}"
+    elif [[ "${interval}" -gt "${refresh_max_interval}" ]]; then
+      interval="${refresh_max_interval}"
+    fi
+  fi
+
+  output=$({ printf ".timeout 30000\\nUPDATE adlist SET next_update = %i, etag = COALESCE(NULLIF('%s',''),etag), last_modified = COALESCE(NULLIF('%s',''),last_modified) WHERE id = %i;\\n" \
+    "$((now + interval))" "${etag//\'/\'\'}" "${last_modified//\'/\'\'}" "${adlistID}" | pihole-FTL sqlite3 -ni "${gravityTEMPfile}"; } 2>&1)
+  status="$?"
+
+  if [[ "${status}" -ne 0 ]]; then
+    echo -e "\\n  ${CROSS} Unable to schedule adlist with ID ${adlistID} in database ${gravityTEMPfile}\\n  ${output}"
+    gravity_Cleanup "error"
+  fi
+}
+
 # Migrate pre-v5.0 list files to database-based Pi-hole versions
 migrate_to_database() {
   # Create database file only if not present
@@ -419,6 +595,91 @@ try_restore_backup () {
   return 1
 }
 
+# Print the domain of each of the given adlist URLs, "local" for local files
+gravity_ParseSourceDomains() {
+  # Logic: Split by folder/port
+  awk -F '[/:]' '{
+    # Remove URL protocol & optional username:password@
+    gsub(/(.*:\/\/|.*:.*@)/, "", $0)
+    if(length($1)>0){print $1}
+    else {print "local"}
+  }' <<<"$(printf '%s\n' "$@")" 2>/dev/null
+}
+
+# Determine which optional features the locally available version of curl supports
+gravity_CheckCurlFeatures() {
+  # Use compression to reduce the amount of data that is transferred
+  # between the Pi-hole and the ad list provider. Use this feature
+  # only if it is supported by the locally available version of curl
+  if curl -V | grep -q "Features:.* libz"; then
+    compression="--compressed"
+    echo -e "  ${INFO} Using libz compression\n"
+  else
+    compression=""
+    echo -e "  ${INFO} Libz compression not available\n"
+  fi
+
+  # Check if etag is supported by the locally available version of curl
+  # (available as of curl 7.68.0, released Jan 2020)
+  # https://github.com/curl/curl/pull/4543 +
+  # https://github.com/curl/curl/pull/4678
+  if curl --help all | grep -q "etag-save"; then
+    etag_support=true
+  fi
+}
+
+# Download a single adlist and add its domains to the new gravity database
+gravity_DownloadSource() {
+  local url="${1}" id="${2}" type="${3}" domain="${4}" saveLocation="${5}"
+  local str adlist_type directory
+  if [[ "${type}" -eq "0" ]]; then
+    # Gravity list
+    str="blocklist"
+    adlist_type="gravity"
+  else
+    # AntiGravity list
+    str="allowlist"
+    adlist_type="antigravity"
+  fi
+
+  # Check if we can write to the save location file without actually creating
+  # it (in case it doesn't exist)
+  # First, check if the directory is writable
+  directory="$(dirname -- "${saveLocation}")"
+  if [ ! -w "${directory}" ]; then
+    echo -e "  ${CROSS} Unable to write to ${directory}"
+    echo "      Please run pihole -g as root"
+    echo ""
+    return
+  fi
+  # Then, check if the file is writable (if it exists)
+  if [ -e "${saveLocation}" ] && [ ! -w "${saveLocation}" ]; then
+    echo -e "  ${CROSS} Unable to write to ${saveLocation}"
+    echo "      Please run pihole -g as root"
+    echo ""
+    return
+  fi
+
+  echo -e "  ${INFO} Target: ${url}"
+  local regex check_url
+  # Check for characters NOT allowed in URLs
+  regex="[^a-zA-Z0-9:/?&%=~._()-;]"
+
+  # this will remove first @ that is after schema and before domain
+  # \1 is optional schema, \2 is userinfo
+  check_url="$(sed -re 's#([^:/]*://)?([^/]+)@#\1\2#' <<<"$url")"
+
+  if [[ "${check_url}" =~ ${regex} ]]; then
+    echo -e "  ${CROSS} Invalid Target"
+    # Schedule the next attempt like a failed download so the list is not
+    # due again on every run
+    gravity_ScheduleAdlist "${id}" "${saveLocation}" "" false
+  else
+    timeit gravity_DownloadBlocklistFromUrl "${url}" "${id}" "${saveLocation}" "${compression}" "${adlist_type}" "${domain}"
+  fi
+  echo ""
+}
+
 # Retrieve blocklist URLs and parse domains from adlist.list
 gravity_DownloadBlocklists() {
   echo -e "  ${INFO} ${COL_BOLD}Neutrino emissions detected${COL_NC}..."
@@ -427,7 +688,7 @@ gravity_DownloadBlocklists() {
     echo -e "  ${INFO} Storing gravity database in ${COL_BOLD}${gravityDBfile}${COL_NC}"
   fi
 
-  local url domain str compression adlist_type directory success
+  local str success
   echo ""
 
   # Prepare new gravity database
@@ -489,15 +750,7 @@ gravity_DownloadBlocklists() {
   mapfile -t sourceTypes <<<"$(pihole-FTL sqlite3 -ni "${gravityDBfile}" "SELECT type FROM vw_adlist;" 2>/dev/null)"
 
   # Parse source domains from $sources
-  mapfile -t sourceDomains <<<"$(
-    # Logic: Split by folder/port
-    awk -F '[/:]' '{
-      # Remove URL protocol & optional username:password@
-      gsub(/(.*:\/\/|.*:.*@)/, "", $0)
-      if(length($1)>0){print $1}
-      else {print "local"}
-    }' <<<"$(printf '%s\n' "${sources[@]}")" 2>/dev/null
-  )"
+  mapfile -t sourceDomains <<<"$(gravity_ParseSourceDomains "${sources[@]}")"
 
   local str="Pulling blocklist source list into range"
   echo -e "${OVER}  ${TICK} ${str}"
@@ -508,82 +761,138 @@ gravity_DownloadBlocklists() {
     unset sources
   fi
 
-  # Use compression to reduce the amount of data that is transferred
-  # between the Pi-hole and the ad list provider. Use this feature
-  # only if it is supported by the locally available version of curl
-  if curl -V | grep -q "Features:.* libz"; then
-    compression="--compressed"
-    echo -e "  ${INFO} Using libz compression\n"
-  else
-    compression=""
-    echo -e "  ${INFO} Libz compression not available\n"
-  fi
-
-  # Check if etag is supported by the locally available version of curl
-  # (available as of curl 7.68.0, released Jan 2020)
-  # https://github.com/curl/curl/pull/4543 +
-  # https://github.com/curl/curl/pull/4678
-  if curl --help all | grep -q "etag-save"; then
-    etag_support=true
-  fi
+  gravity_CheckCurlFeatures
 
   # Loop through $sources and download each one
   for ((i = 0; i < "${#sources[@]}"; i++)); do
-    url="${sources[$i]}"
-    domain="${sourceDomains[$i]}"
-    id="${sourceIDs[$i]}"
-    if [[ "${sourceTypes[$i]}" -eq "0" ]]; then
-      # Gravity list
-      str="blocklist"
-      adlist_type="gravity"
-    else
-      # AntiGravity list
-      str="allowlist"
-      adlist_type="antigravity"
-    fi
-
     # Save the file as list.#.domain
-    saveLocation="${listsCacheDir}/list.${id}.${domain}.${domainsExtension}"
+    saveLocation="${listsCacheDir}/list.${sourceIDs[$i]}.${sourceDomains[$i]}.${domainsExtension}"
     activeDomains[i]="${saveLocation}"
 
-    # Check if we can write to the save location file without actually creating
-    # it (in case it doesn't exist)
-    # First, check if the directory is writable
-    directory="$(dirname -- "${saveLocation}")"
-    if [ ! -w "${directory}" ]; then
-      echo -e "  ${CROSS} Unable to write to ${directory}"
-      echo "      Please run pihole -g as root"
-      echo ""
-      continue
-    fi
-    # Then, check if the file is writable (if it exists)
-    if [ -e "${saveLocation}" ] && [ ! -w "${saveLocation}" ]; then
-      echo -e "  ${CROSS} Unable to write to ${saveLocation}"
-      echo "      Please run pihole -g as root"
-      echo ""
-      continue
-    fi
+    gravity_DownloadSource "${sources[$i]}" "${sourceIDs[$i]}" "${sourceTypes[$i]}" "${sourceDomains[$i]}" "${saveLocation}"
+  done
 
-    echo -e "  ${INFO} Target: ${url}"
-    local regex check_url
-    # Check for characters NOT allowed in URLs
-    regex="[^a-zA-Z0-9:/?&%=~._()-;]"
+  DownloadBlocklists_done=true
+}
 
-    # this will remove first @ that is after schema and before domain
-    # \1 is optional schema, \2 is userinfo
-    check_url="$(sed -re 's#([^:/]*://)?([^/]+)@#\1\2#' <<<"$url")"
+# Refresh only the given adlists (IDs or addresses) in the live gravity
+# database instead of building a new database from scratch
+gravity_RefreshSelectedLists() {
+  local str selector condition="" ids replaced dropped changed replace output status i
+  local -a sources sourceIDs sourceTypes sourceDomains
 
-    if [[ "${check_url}" =~ ${regex} ]]; then
-      echo -e "  ${CROSS} Invalid Target"
+  echo -e "  ${INFO} ${COL_BOLD}Neutrino emissions detected${COL_NC}..."
+  echo ""
+
+  # Build the condition selecting the requested adlists, single quotes in
+  # addresses are escaped for SQL
+  for selector in "$@"; do
+    if [[ "${selector}" =~ ^[0-9]+$ ]]; then
+      condition+="${condition:+ OR }id = ${selector}"
     else
-      timeit gravity_DownloadBlocklistFromUrl "${url}" "${sourceIDs[$i]}" "${saveLocation}" "${compression}" "${adlist_type}" "${domain}"
+      condition+="${condition:+ OR }address = '${selector//\'/\'\'}'"
     fi
-    echo ""
   done
 
-  DownloadBlocklists_done=true
+  mapfile -t sources <<<"$(pihole-FTL sqlite3 -ni "${gravityDBfile}" "SELECT address FROM vw_adlist WHERE ${condition};" 2>/dev/null)"
+  mapfile -t sourceIDs <<<"$(pihole-FTL sqlite3 -ni "${gravityDBfile}" "SELECT id FROM vw_adlist WHERE ${condition};" 2>/dev/null)"
+  mapfile -t sourceTypes <<<"$(pihole-FTL sqlite3 -ni "${gravityDBfile}" "SELECT type FROM vw_adlist WHERE ${condition};" 2>/dev/null)"
+
+  if [[ -z "${sourceIDs[*]}" ]]; then
+    echo -e "  ${CROSS} No enabled adlist matches ${*}"
+    return 1
+  fi
+  ids="$(IFS=,; echo "${sourceIDs[*]}")"
+  mapfile -t sourceDomains <<<"$(gravity_ParseSourceDomains "${sources[@]}")"
+
+  # Collect the domains of the selected lists in a small scratch database. The
+  # download functions operate on ${gravityTEMPfile}, so point it there. Lists
+  # which stayed unchanged are not parsed, their rows stay as they are
+  gravityTEMPfile="${gravityPARTIALfile}"
+  keepUnchangedLists=true
+  str="Preparing scratch database for adlist(s) ${ids}"
+  echo -ne "  ${INFO} ${str}..."
+  rm -f "${gravityTEMPfile}"
+  output=$({ pihole-FTL sqlite3 -ni "${gravityTEMPfile}" <"${gravityDBschema}" &&
+    printf ".timeout 30000\\nATTACH DATABASE '%s' AS OLD;\\nINSERT INTO adlist SELECT * FROM OLD.adlist WHERE id IN (%s);\\n" "${gravityDBfile}" "${ids}" |
+    pihole-FTL sqlite3 -ni "${gravityTEMPfile}"; } 2>&1)
+  status="$?"
+
+  if [[ "${status}" -ne 0 ]]; then
+    echo -e "\\n  ${CROSS} Unable to create scratch database ${gravityTEMPfile}\\n  ${output}"
+    rm -f "${gravityTEMPfile}"
+    return 1
+  fi
+  echo -e "${OVER}  ${TICK} ${str}"
+
+  gravity_CheckCurlFeatures
+
+  for ((i = 0; i < "${#sources[@]}"; i++)); do
+    gravity_DownloadSource "${sources[$i]}" "${sourceIDs[$i]}" "${sourceTypes[$i]}" "${sourceDomains[$i]}" \
+      "${listsCacheDir}/list.${sourceIDs[$i]}.${sourceDomains[$i]}.${domainsExtension}"
+  done
+
+  # Only lists which were downloaded anew (status 1) replace their rows in the
+  # live database. Lists which failed but have a cached copy (status 3) keep
+  # their rows, lists without any copy (status 4) lose the rows they still
+  # have. Everything happens in a single transaction so FTL never sees a
+  # partially refreshed list. The status and schedule of all selected lists
+  # is updated
+  replaced="$(pihole-FTL sqlite3 -ni "${gravityTEMPfile}" "SELECT group_concat(id) FROM adlist WHERE status = 1;")"
+  dropped="$(pihole-FTL sqlite3 -ni "${gravityTEMPfile}" "SELECT group_concat(id) FROM adlist WHERE status = 4;")"
+  if [[ -n "${dropped}" ]]; then
+    dropped="$(pihole-FTL sqlite3 -ni "${gravityDBfile}" "SELECT group_concat(id) FROM adlist WHERE id IN (${dropped}) AND number > 0;")"
+  fi
+  changed="${replaced}${replaced:+${dropped:+,}}${dropped}"
+  if [[ -n "${changed}" ]]; then
+    str="Replacing domains of adlist(s) ${changed} in ${gravityDBfile}"
+    replace="DELETE FROM gravity WHERE adlist_id IN (${changed});
+DELETE FROM antigravity WHERE adlist_id IN (${changed});
+INSERT INTO gravity SELECT * FROM NEW.gravity WHERE adlist_id IN (${replaced:-NULL});
+INSERT INTO antigravity SELECT * FROM NEW.antigravity WHERE adlist_id IN (${replaced:-NULL});
+INSERT OR REPLACE INTO info (property,value) VALUES ('gravity_count',(SELECT COUNT(*) FROM (SELECT DISTINCT domain FROM gravity)));"
+  else
+    str="Updating status of adlist(s) ${ids} in ${gravityDBfile}"
+    replace=""
+  fi
+  echo -ne "  ${INFO} ${str}..."
+  output=$({ pihole-FTL sqlite3 -ni "${gravityDBfile}" <<EOT
+.timeout 30000
+ATTACH DATABASE '${gravityTEMPfile}' AS NEW;
+BEGIN TRANSACTION;
+${replace}
+UPDATE adlist SET number = n.number, invalid_domains = n.invalid_domains, status = n.status,
+                  abp_entries = n.abp_entries, date_updated = n.date_updated,
+                  next_update = n.next_update, etag = n.etag, last_modified = n.last_modified
+  FROM NEW.adlist AS n WHERE adlist.id = n.id;
+COMMIT;
+EOT
+  } 2>&1)
+  status="$?"
+  rm -f "${gravityTEMPfile}"
+
+  if [[ "${status}" -ne 0 ]]; then
+    echo -e "\\n  ${CROSS} Unable to update ${gravityDBfile}\\n  ${output}"
+    return 1
+  fi
+  echo -e "${OVER}  ${TICK} ${str}"
+
+  # Nothing else changed if all lists stayed the same, only catch up on group
+  # or domainlist changes made since the last run
+  if [[ -z "${changed}" ]]; then
+    if [[ "$(pihole-FTL sqlite3 -ni "${gravityDBfile}" "SELECT value FROM info WHERE property = 'gravity_by_group';")" == "stale" ]]; then
+      gravity_build_group_table "${gravityDBfile}"
+    fi
+    return 0
+  fi
+
+  gravity_build_group_table "${gravityDBfile}"
+
+  # FTL does not notice in-place changes of the database, tell it to reload
+  "${PIHOLE_COMMAND}" reloadlists
 }
 
+# Returns 1 if the list stayed unchanged since the last download
 compareLists() {
   local adlistID="${1}" target="${2}"
 
@@ -598,6 +907,7 @@ compareLists() {
     else
       echo "  ${INFO} List stayed unchanged"
       database_adlist_status "${adlistID}" "2"
+      return 1
     fi
   else
     # No checksum available, create one for comparing on the next run
@@ -611,7 +921,7 @@ compareLists() {
 # Download specified URL and perform checks on HTTP status and file content
 gravity_DownloadBlocklistFromUrl() {
   local url="${1}" adlistID="${2}" saveLocation="${3}" compression="${4}" gravity_type="${5}" domain="${6}"
-  local listCurlBuffer str httpCode success="" ip customUpstreamResolver=""
+  local listCurlBuffer listHeaders str httpCode success="" ip customUpstreamResolver=""
   local file_path permissions ip_addr port blocked=false download=true
   # modifiedOptions is an array to store all the options used to check if the adlist has been changed upstream
   local modifiedOptions=()
@@ -621,6 +931,8 @@ gravity_DownloadBlocklistFromUrl() {
   listCurlBuffer="$(mktemp -p "${GRAVITY_TMPDIR}")"
   mv "${listCurlBuffer}" "${listCurlBuffer%.*}.phgpb"
   listCurlBuffer="${listCurlBuffer%.*}.phgpb"
+  # The response headers are needed to schedule the next refresh of this list
+  listHeaders="${listCurlBuffer%.*}.headers.phgpb"
 
   # For all remote files, we try to determine if the file has changed to skip
   # downloading them whenever possible.
@@ -755,7 +1067,7 @@ gravity_DownloadBlocklistFromUrl() {
   fi
 
   if [[ "${download}" == true ]]; then
-    httpCode=$(curl --connect-timeout ${curl_connect_timeout} -s -L ${compression:+${compression}} ${customUpstreamResolver:+${customUpstreamResolver}} "${modifiedOptions[@]}" -w "%{http_code}" "${url}" -o "${listCurlBuffer}" 2>/dev/null)
+    httpCode=$(curl --connect-timeout ${curl_connect_timeout} -s -L ${compression:+${compression}} ${customUpstreamResolver:+${customUpstreamResolver}} "${modifiedOptions[@]}" -D "${listHeaders}" -w "%{http_code}" "${url}" -o "${listCurlBuffer}" 2>/dev/null)
   fi
 
   case $url in
@@ -800,8 +1112,11 @@ gravity_DownloadBlocklistFromUrl() {
     if [[ "${httpCode}" == "304" ]]; then
       # Set list status to "unchanged/cached"
       database_adlist_status "${adlistID}" "2"
-      # Add domains to database table file
-      pihole-FTL "${gravity_type}" parseList "${saveLocation}" "${gravityTEMPfile}" "${adlistID}"
+      # Add domains to database table file, unless the rows of unchanged lists
+      # are kept (see gravity_RefreshSelectedLists)
+      if [[ "${keepUnchangedLists:-}" != true ]]; then
+        pihole-FTL "${gravity_type}" parseList "${saveLocation}" "${gravityTEMPfile}" "${adlistID}"
+      fi
       done="true"
     # Check if $listCurlBuffer is a non-zero length file
     elif [[ -s "${listCurlBuffer}" ]]; then
@@ -809,10 +1124,11 @@ gravity_DownloadBlocklistFromUrl() {
       mv "${listCurlBuffer}" "${saveLocation}"
       # Ensure the file has the correct permissions
       fix_owner_permissions "${saveLocation}"
-      # Compare lists if they are identical
-      compareLists "${adlistID}" "${saveLocation}"
-      # Add domains to database table file
-      pihole-FTL "${gravity_type}" parseList "${saveLocation}" "${gravityTEMPfile}" "${adlistID}"
+      # Compare lists if they are identical and add domains to database table
+      # file, unless the rows of unchanged lists are kept
+      if compareLists "${adlistID}" "${saveLocation}" || [[ "${keepUnchangedLists:-}" != true ]]; then
+        pihole-FTL "${gravity_type}" parseList "${saveLocation}" "${gravityTEMPfile}" "${adlistID}"
+      fi
       done="true"
     else
       # Fall back to previously cached list if $listCurlBuffer is empty
@@ -836,6 +1152,9 @@ gravity_DownloadBlocklistFromUrl() {
       database_adlist_status "${adlistID}" "4"
     fi
   fi
+
+  gravity_ScheduleAdlist "${adlistID}" "${saveLocation}" "${listHeaders}" "${done}"
+  rm -f "${listHeaders}"
 }
 
 # Report number of entries in a table
@@ -865,6 +1184,230 @@ gravity_ShowCount() {
   gravity_Table_Count "domainlist WHERE type = 2 AND enabled = 1" "regex allowed filters"
 }
 
+# Time every enabled regex filter against a sample of domains from gravity and
+# recent queries. grep -E stands in for FTL's regex engine, both implement
+# POSIX extended regular expressions. A few long domains of repeating
+# characters are added to provoke the worst case of backtracking patterns.
+# The results are stored in the regex_profile table to make regressions visible
+# Takes one argument: the gravity database to work on
+gravity_ProfileRegex() {
+  local database="${1}" str sample ftldb samples baseline start elapsed rc median now
+  local line id regex cost status i slow=0 catastrophic=0 invalid=0 values=""
+  local -a filters ids regexes costs statuses
+  local -A previous
+
+  mapfile -t filters <<<"$(pihole-FTL sqlite3 -ni "${database}" "SELECT id || ' ' || domain FROM domainlist WHERE type IN (2, 3) AND enabled = 1;")"
+  if [[ -z "${filters[*]}" ]]; then
+    echo -e "  ${INFO} No regex filters to profile"
+    return 0
+  fi
+
+  str="Profiling ${#filters[@]} regex filters"
+  echo -ne "  ${INFO} ${str}..."
+
+  sample="$(mktemp -p "${GRAVITY_TMPDIR}")"
+  pihole-FTL sqlite3 -ni "${database}" "SELECT domain FROM gravity WHERE domain NOT LIKE '||%^' ORDER BY RANDOM() LIMIT ${regex_sample_size};" >"${sample}"
+  ftldb=$(getFTLConfigValue files.database)
+  ftldb="${ftldb:-/etc/pihole/pihole-FTL.db}"
+  if [[ -f "${ftldb}" ]]; then
+    printf ".timeout 30000\\nSELECT domain FROM domain_by_id WHERE id IN (SELECT domain FROM query_storage ORDER BY id DESC LIMIT 100000) LIMIT %s;\\n" "${regex_sample_size}" |
+      pihole-FTL sqlite3 -ni "${ftldb}" >>"${sample}" 2>/dev/null
+  fi
+  line="$(printf 'a%.0s' {1..63})"
+  printf '%s\n' "${line}.${line}.${line}.${line:0:61}" "${line}.${line}.${line}.${line:0:60}-" "$(printf 'ab%.0s' {1..60}).com" >>"${sample}"
+  samples=$(wc -l <"${sample}")
+
+  # Time needed to start grep and read the sample, subtracted from every run
+  start=$(date +%s%N)
+  grep -c -F -e '#' "${sample}" >/dev/null
+  baseline=$(($(date +%s%N) - start))
+
+  for line in "${filters[@]}"; do
+    id="${line%% *}"
+    # Strip FTL's regex extensions like ;querytype=A or ;invert
+    regex="${line#* }"
+    regex="${regex%%;*}"
+
+    start=$(date +%s%N)
+    timeout "${regex_timeout}" grep -E -i -c -e "${regex}" "${sample}" >/dev/null 2>&1
+    rc="$?"
+    elapsed=$(($(date +%s%N) - start - baseline))
+    cost=$((elapsed > 0 ? elapsed / samples : 0))
+
+    case "${rc}" in
+    124) status=2 ;;
+    2) status=3 ;;
+    *) status=0 ;;
+    esac
+    ids+=("${id}")
+    regexes+=("${regex}")
+    costs+=("${cost}")
+    statuses+=("${status}")
+  done
+  rm -f "${sample}"
+
+  median=$(for ((i = 0; i < ${#ids[@]}; i++)); do
+    [[ "${statuses[$i]}" -eq 0 ]] && echo "${costs[$i]}"
+  done | sort -n | awk '{ c[NR] = $1 } END { print (NR ? c[int((NR + 1) / 2)] : 0) }')
+
+  echo -e "${OVER}  ${TICK} ${str} (${samples} sample domains, median ${median} ns per domain)"
+
+  while read -r id cost; do
+    [[ -n "${id}" ]] && previous["${id}"]="${cost}"
+  done <<<"$(pihole-FTL sqlite3 -ni "${database}" "SELECT domainlist_id || ' ' || cost FROM regex_profile AS r WHERE timestamp = (SELECT MAX(timestamp) FROM regex_profile WHERE domainlist_id = r.domainlist_id);")"
+
+  now=$(date +%s)
+  for ((i = 0; i < ${#ids[@]}; i++)); do
+    id="${ids[$i]}" cost="${costs[$i]}"
+    if [[ "${statuses[$i]}" -eq 2 ]]; then
+      # The regex is printed with %s so backslash sequences in it stay as they are
+      printf "  %b Regex %s timed out after %ss, possibly catastrophic backtracking: %b%s%b\\n" "${CROSS}" "${id}" "${regex_timeout}" "${COL_RED}" "${regexes[$i]}" "${COL_NC}"
+      catastrophic=$((catastrophic + 1))
+    elif [[ "${statuses[$i]}" -eq 3 ]]; then
+      printf "  %b Regex %s is invalid: %b%s%b\\n" "${CROSS}" "${id}" "${COL_RED}" "${regexes[$i]}" "${COL_NC}"
+      invalid=$((invalid + 1))
+    elif [[ "${cost}" -ge "${regex_slow_min_cost}" && "${cost}" -ge $((median * regex_slow_factor)) ]]; then
+      statuses[i]=1
+      printf "  %b Regex %s is slow (%s ns per domain): %b%s%b\\n" "${INFO}" "${id}" "${cost}" "${COL_YELLOW}" "${regexes[$i]}" "${COL_NC}"
+      slow=$((slow + 1))
+    fi
+    if [[ "${statuses[$i]}" -lt 2 && -n "${previous[${id}]:-}" && "${cost}" -ge "${regex_slow_min_cost}" && "${cost}" -ge $((previous[${id}] * 3)) ]]; then
+      echo -e "  ${INFO} Regex ${id} became $((cost / (previous[${id}] > 0 ? previous[${id}] : 1)))x slower since the last profile (${previous[${id}]} ns per domain)"
+    fi
+    values+="${values:+,}(${id},${now},${samples},${cost},${statuses[$i]})"
+  done
+
+  if [[ $((slow + catastrophic + invalid)) -gt 0 ]]; then
+    echo -e "  ${INFO} Found ${slow} slow, ${catastrophic} timed out and ${invalid} invalid regex filters"
+  fi
+
+  # Keep the history for a year
+  output=$({ printf ".timeout 30000\\nINSERT OR REPLACE INTO regex_profile (domainlist_id, timestamp, samples, cost, status) VALUES %s;\\nDELETE FROM regex_profile WHERE timestamp < %s;\\n" "${values}" "$((now - 31536000))" |
+    pihole-FTL sqlite3 -ni "${database}"; } 2>&1)
+  status="$?"
+
+  if [[ "${status}" -ne 0 ]]; then
+    echo -e "  ${CROSS} Unable to store regex profile in ${database}\\n  ${output}"
+    return 1
+  fi
+}
+
+# Print how long the local resolver takes to answer a query for pi.hole in
+# milliseconds. FTL answers it itself, so the result does not depend on any
+# upstream server. A timeout counts as one second
+gravity_ProbeLatency() {
+  local latency
+  latency=$(dig +tries=1 +time=1 -p "${dnsPort}" pi.hole @127.0.0.1 2>/dev/null | sed -n 's/^;; Query time: \([0-9]*\) msec.*$/\1/p')
+  echo "${latency:-1000}"
+}
+
+# Print the 50th and 99th percentile of the numbers in a file
+gravity_Percentiles() {
+  sort -n "${1}" | awk '{ v[NR] = $1 } END {
+    if (!NR) { print "n/a"; exit }
+    p50 = int((NR * 50 + 99) / 100); p99 = int((NR * 99 + 99) / 100)
+    printf "%d/%d", v[p50 ? p50 : 1], v[p99 ? p99 : 1]
+  }'
+}
+
+# Enter governed mode: lower the CPU and I/O priority of this script and of
+# everything it starts, limit the memory used by SQLite and sample the latency
+# of the local resolver in the background to throttle the build on
+gravity_Govern() {
+  local i target
+  governed=true
+  sqlitePragmas="PRAGMA cache_size=-${GRAVITY_MEMORY};"
+  if [[ ! "${GRAVITY_DUTY_CYCLE}" =~ ^[0-9]+$ ]] || [[ "${GRAVITY_DUTY_CYCLE}" -lt 1 || "${GRAVITY_DUTY_CYCLE}" -gt 100 ]]; then
+    GRAVITY_DUTY_CYCLE=50
+  fi
+  if [[ ! "${GRAVITY_PROBE_INTERVAL}" =~ ^[0-9]+$ ]] || [[ "${GRAVITY_PROBE_INTERVAL}" -lt 1 ]]; then
+    GRAVITY_PROBE_INTERVAL=10
+  fi
+  throttlePaused=0
+  throttleWaited=0
+
+  if [[ "${GRAVITY_LATENCY_TARGET}" -gt 0 ]] && command -v dig &>/dev/null; then
+    dnsPort=$(getFTLConfigValue dns.port)
+    latencyBaseline="$(mktemp -p "${GRAVITY_TMPDIR}")"
+    latencySamples="$(mktemp -p "${GRAVITY_TMPDIR}")"
+    for i in {1..5}; do
+      gravity_ProbeLatency >>"${latencyBaseline}"
+    done
+    # Start sampling before lowering the priority so the probes are not delayed
+    # by the build itself. The probes are real queries and end up in the query
+    # log, so they are kept rare. The loop ends with this script and does not
+    # hold on to the gravity lock
+    while kill -0 $$ 2>/dev/null; do
+      gravity_ProbeLatency >>"${latencySamples}"
+      sleep "${GRAVITY_PROBE_INTERVAL}"
+    done 9>&- &
+    latencyProbePID=$!
+    trap 'kill "${latencyProbePID}" 2>/dev/null' EXIT
+  fi
+
+  renice -n "${GRAVITY_NICE}" -p $$ >/dev/null
+  if command -v ionice &>/dev/null; then
+    ionice -c 2 -n "${GRAVITY_IONICE}" -p $$ >/dev/null 2>&1
+  fi
+  target="off"
+  if [[ -n "${latencyProbePID:-}" ]]; then
+    target="${GRAVITY_LATENCY_TARGET} ms"
+  fi
+  echo -e "  ${INFO} Governed mode: nice ${GRAVITY_NICE}, ionice ${GRAVITY_IONICE}, SQLite memory ${GRAVITY_MEMORY} KiB, duty cycle ${GRAVITY_DUTY_CYCLE}%, latency target ${target}"
+  throttleMark=$(date +%s%3N)
+}
+
+# Pause between the heavy SQLite steps in governed mode. Downloads are not
+# paced, they mostly wait for the network. The pause keeps the share of
+# time spent working at GRAVITY_DUTY_CYCLE percent. While the local resolver
+# answers slower than GRAVITY_LATENCY_TARGET, the build additionally waits for
+# it to recover, but at most ${governed_max_wait} seconds per step
+gravity_Throttle() {
+  local busy pause waited=0 latency
+  if [[ "${governed:-}" != true ]]; then
+    return 0
+  fi
+
+  busy=$(($(date +%s%3N) - throttleMark))
+  pause=$((busy * (100 - GRAVITY_DUTY_CYCLE) / GRAVITY_DUTY_CYCLE))
+  if [[ "${pause}" -gt 0 ]]; then
+    sleep "$((pause / 1000)).$(printf "%03d" $((pause % 1000)))"
+    throttlePaused=$((throttlePaused + pause))
+  fi
+
+  if [[ -n "${latencyProbePID:-}" ]]; then
+    # Start from the latest background sample. Only while the resolver is
+    # slow, probe it directly every two seconds until it recovered
+    latency=$(tail -n 1 "${latencySamples}")
+    while [[ "${latency:-0}" -gt "${GRAVITY_LATENCY_TARGET}" && "${waited}" -lt "${governed_max_wait}" ]]; do
+      sleep 2
+      waited=$((waited + 2))
+      latency=$(gravity_ProbeLatency)
+      echo "${latency}" >>"${latencySamples}"
+    done
+    throttleWaited=$((throttleWaited + waited))
+  fi
+  throttleMark=$(date +%s%3N)
+}
+
+# Report the run time of a governed run against the latency of the local
+# resolver before and during the run
+gravity_ReportGoverned() {
+  local str
+  if [[ "${governed:-}" != true ]]; then
+    return 0
+  fi
+
+  str="Governed run took ${SECONDS}s (paused $((throttlePaused / 1000))s, waited ${throttleWaited}s for DNS to recover)"
+  if [[ -n "${latencyProbePID:-}" ]]; then
+    kill "${latencyProbePID}" 2>/dev/null
+    str="${str}, local DNS latency p50/p99 $(gravity_Percentiles "${latencyBaseline}") ms before and $(gravity_Percentiles "${latencySamples}") ms during the run ($(wc -l <"${latencySamples}") probes)"
+    rm -f "${latencyBaseline}" "${latencySamples}"
+    unset latencyProbePID
+  fi
+  echo -e "  ${INFO} ${str}"
+}
+
 # Trap Ctrl-C
 gravity_Trap() {
   trap '{ echo -e "\\n\\n  ${INFO} ${COL_RED}User-abort detected${COL_NC}"; gravity_Cleanup "error"; }' INT
@@ -899,6 +1442,8 @@ gravity_Cleanup() {
 
   echo -e "${OVER}  ${TICK} ${str}"
 
+  gravity_ReportGoverned
+
   # Print Pi-hole status if an error occurred
   if [[ -n "${error}" ]]; then
     "${PIHOLE_COMMAND}" status
@@ -958,9 +1503,13 @@ gravity_optimize() {
     # the collected information in internal tables of the database where the
     # query optimizer can access the information and use it to help make better
     # query planning choices
-    local str="Optimizing database"
+    local str="Optimizing database" limit=0
+    # In governed mode, sample the indices instead of reading them completely
+    if [[ "${governed:-}" == true ]]; then
+        limit=1000
+    fi
     echo -ne "  ${INFO} ${str}..."
-    output=$( { pihole-FTL sqlite3 -ni "${gravityTEMPfile}" "PRAGMA analysis_limit=0; ANALYZE" 2>&1; } 2>&1 )
+    output=$( { pihole-FTL sqlite3 -ni "${gravityTEMPfile}" "${sqlitePragmas}PRAGMA analysis_limit=${limit}; ANALYZE" 2>&1; } 2>&1 )
     status="$?"
 
     if [[ "${status}" -ne 0 ]]; then
@@ -1045,6 +1594,26 @@ Update domains from blocklists specified in adlists.list
 Options:
   -f, --force          Force the download of all specified blocklists
   -t, --timeit         Time the gravity update process
+  --only <id|url> ...  Refresh only the given adlists in the existing database
+  --due                Refresh only the adlists that are due according to
+                       their refresh interval or HTTP caching headers
+                       (skipped while another gravity run is in progress)
+  --by-group           Maintain a table with the effective blocklist of
+                       every group (kept for subsequent runs, regex allow
+                       filters are not applied to it)
+  --no-by-group        Stop maintaining the per-group blocklist
+  --profile-regex      Only measure the cost of the regex filters against
+                       the existing database (also done on every run)
+  --governed           Protect DNS latency on small hardware: run at low
+                       CPU and I/O priority, limit SQLite's memory, pause
+                       between heavy steps and while the local resolver is
+                       slow. Tuned with the environment variables
+                       GRAVITY_NICE (19), GRAVITY_IONICE (7), GRAVITY_MEMORY
+                       (KiB, 16384), GRAVITY_DUTY_CYCLE (%, 50),
+                       GRAVITY_LATENCY_TARGET (ms, 50, 0 disables probing)
+                       and GRAVITY_PROBE_INTERVAL (s, 10). The latency probes
+                       are queries for pi.hole from 127.0.0.1 and appear in
+                       the query log and statistics
   -h, --help           Show this help dialog"
   exit 0
 }
@@ -1078,9 +1647,22 @@ Available options:
   esac
 }
 
+onlyLists=()
 for var in "$@"; do
+  # Collect all arguments following --only up to the next option
+  if [[ "${collectOnly:-}" == true && "${var}" != -* ]]; then
+    onlyLists+=("${var}")
+    continue
+  fi
+  collectOnly=false
   case "${var}" in
   "-f" | "--force") forceDelete=true ;;
+  "--only") collectOnly=true onlyRequested=true ;;
+  "--due") dueOnly=true ;;
+  "--by-group") groupTable=true ;;
+  "--no-by-group") groupTable=false ;;
+  "--profile-regex") profileOnly=true ;;
+  "--governed") governed=true ;;
   "-t" | "--timeit") timed=true ;;
   "-r" | "--repair") repairSelector "$3" ;;
   "-u" | "--upgrade")
@@ -1091,6 +1673,45 @@ for var in "$@"; do
   esac
 done
 
+# --only without any adlist must not fall through to a full run
+if [[ "${onlyRequested:-}" == true && "${#onlyLists[@]}" -eq 0 ]]; then
+  echo -e "  ${CROSS} --only requires at least one adlist ID or address, see 'pihole -g --help'"
+  exit 1
+fi
+
+# Only one gravity run may work on the database, the list cache and the
+# temporary files at a time. The lock is released when this script exits.
+# Scheduled refreshes of due lists skip their turn while another run is in
+# progress, every other run waits for it to finish. The lock is taken on a
+# read-only descriptor so that runs as root (cron) and as the pihole user
+# (web interface) can share the same file
+if [[ ! -e "${gravityLOCKfile}" ]]; then
+  touch "${gravityLOCKfile}" 2>/dev/null && fix_owner_permissions "${gravityLOCKfile}" 2>/dev/null
+fi
+if ! { exec 9<"${gravityLOCKfile}"; } 2>/dev/null; then
+  echo -e "  ${CROSS} Unable to open ${gravityLOCKfile}, please try again with sudo"
+  exit 1
+fi
+if ! flock -n 9; then
+  if [[ "${dueOnly:-}" == true ]]; then
+    echo -e "  ${INFO} Another gravity run is in progress, skipping the refresh of due adlists"
+    exit 0
+  fi
+  echo -e "  ${INFO} Waiting for another gravity run to finish..."
+  flock 9
+fi
+
+# Profiling the regex filters needs neither DNS nor a new database
+if [[ "${profileOnly:-}" == true ]]; then
+  upgrade_gravityDB "${gravityDBfile}"
+  timeit gravity_ProfileRegex "${gravityDBfile}"
+  exit
+fi
+
+if [[ "${governed:-}" == true ]]; then
+  gravity_Govern
+fi
+
 # Check if DNS is available, no need to do any database manipulation if we're not able to download adlists
 if ! timeit gravity_CheckDNSResolutionAvailable; then
   echo -e "   ${CROSS} No DNS resolution available. Please contact support."
@@ -1128,6 +1749,31 @@ if ! timeit migrate_to_database; then
   exit 1
 fi
 
+# Select the adlists which are due for a refresh
+if [[ "${dueOnly:-}" == true ]]; then
+  mapfile -t onlyLists <<<"$(pihole-FTL sqlite3 -ni "${gravityDBfile}" "SELECT id FROM vw_adlist WHERE id IN (SELECT id FROM adlist WHERE next_update IS NULL OR next_update <= cast(strftime('%s', 'now') as int));")"
+  if [[ -z "${onlyLists[*]}" ]]; then
+    echo -e "  ${TICK} No adlists are due for a refresh"
+    # Catch up on group or domainlist changes made since the last run
+    if [[ "$(pihole-FTL sqlite3 -ni "${gravityDBfile}" "SELECT value FROM info WHERE property = 'gravity_by_group';")" == "stale" ]]; then
+      timeit gravity_build_group_table "${gravityDBfile}"
+    fi
+    exit 0
+  fi
+fi
+
+# Refresh only the requested adlists, this skips building a new database
+if [[ "${#onlyLists[@]}" -gt 0 ]]; then
+  if ! timeit gravity_RefreshSelectedLists "${onlyLists[@]}"; then
+    echo -e "   ${CROSS} Unable to refresh the selected adlists"
+    exit 1
+  fi
+  timeit gravity_Cleanup
+  echo ""
+  echo "  ${TICK} Done."
+  exit 0
+fi
+
 if [[ "${forceDelete:-}" == true ]]; then
   str="Deleting existing list cache"
   echo -ne "  ${INFO} ${str}..."
@@ -1148,15 +1794,29 @@ update_gravity_timestamp
 # Ensure proper permissions are set for the database
 fix_owner_permissions "${gravityTEMPfile}"
 
+# Only the SQLite steps from here on count as busy time for gravity_Throttle,
+# waiting for the downloads does not
+throttleMark=$(date +%s%3N)
+
 # Build the tree
 timeit gravity_build_tree
+gravity_Throttle
+
+# Materialize the per-group blocklist (if enabled)
+timeit gravity_build_group_table "${gravityTEMPfile}"
+gravity_Throttle
 
 # Compute numbers to be displayed (do this after building the tree to get the
 # numbers quickly from the tree instead of having to scan the whole database)
 timeit gravity_ShowCount
 
+# Measure the cost of the regex filters against the new gravity domains
+timeit gravity_ProfileRegex "${gravityTEMPfile}"
+gravity_Throttle
+
 # Optimize the database
 timeit gravity_optimize
+gravity_Throttle
 
 # Migrate rest of the data from old to new database
 # IMPORTANT: Swapping the databases must be the last step before the cleanup
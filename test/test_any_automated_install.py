@@ -309,6 +309,48 @@ def test_FTL_development_binary_installed_and_responsive_no_errors(host):
     assert expected_stdout in version_check.stdout
 
 
+def test_FTL_install_reuses_cached_binary(host):
+    """
+    confirms a repeated FTL install is served from the local cache and only
+    fetches the checksum from the mirror
+    """
+    # The test images have no Python to run an HTTP server, so the mirror is
+    # a local directory read by curl through file://. Every curl call is
+    # logged to /var/log/curl
+    host.run(
+        """
+    echo "{branch}" > /etc/pihole/ftlbranch
+    mkdir -p /tmp/mirror/{branch}
+    touch /tmp/mirror/macvendor.db
+    printf '#!/bin/sh\\necho fake FTL\\n' > /tmp/mirror/{branch}/pihole-FTL-test
+    cd /tmp/mirror/{branch} && sha1sum pihole-FTL-test > pihole-FTL-test.sha1
+    """.format(
+            branch=FTL_BRANCH
+        )
+    )
+    mock_command_passthrough("curl", {}, host)
+    install_script = """
+    export PIHOLE_MIRROR=file:///tmp/mirror
+    source /opt/pihole/basic-install.sh
+    create_pihole_user
+    FTLinstall pihole-FTL-test
+    """
+    first_install = host.run(install_script)
+    assert "transferred..." in first_install.stdout
+    host.run("rm -f /var/log/curl")
+    second_install = host.run(install_script)
+    assert "cached..." in second_install.stdout
+    expected_stdout = tick_box + " Downloading and Installing FTL"
+    assert expected_stdout in second_install.stdout
+    requests = [
+        line
+        for line in host.run("cat /var/log/curl").stdout.splitlines()
+        if "/pihole-FTL-test" in line
+    ]
+    assert len(requests) == 1
+    assert "/tmp/mirror/{}/pihole-FTL-test.sha1".format(FTL_BRANCH) in requests[0]
+
+
 def test_IPv6_only_link_local(host):
     """
     confirms IPv6 blocking is disabled for Link-local address
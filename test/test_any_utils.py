@@ -1,3 +1,6 @@
+from .conftest import mock_command, mock_command_2
+
+
 def test_key_val_replacement_works(host):
     """Confirms addOrEditKeyValPair either adds or replaces a key value pair in a given file"""
     host.run(
@@ -18,6 +21,32 @@ def test_key_val_replacement_works(host):
     assert expected_stdout == output.stdout
 
 
+def test_key_val_pairs_replacement_works(host):
+    """Confirms addOrEditKeyValPairs adds or replaces several key value pairs at once"""
+    host.run(
+        """
+    source /opt/pihole/utils.sh
+    addOrEditKeyValPair "./testoutput" "KEY_ONE" "value1"
+    addOrEditKeyValPair "./testoutput" "KEY_TWO" "value2"
+    chmod 644 ./testoutput
+    addOrEditKeyValPairs "./testoutput" "KEY_THREE=value3" "KEY_ONE=value4" "KEY_FOUR="
+    """
+    )
+    output = host.run(
+        """
+    cat ./testoutput
+    """
+    )
+    expected_stdout = "KEY_ONE=value4\nKEY_TWO=value2\nKEY_THREE=value3\nKEY_FOUR=\n"
+    assert expected_stdout == output.stdout
+    permissions = host.run(
+        """
+    stat -c '%a' ./testoutput
+    """
+    )
+    assert "644\n" == permissions.stdout
+
+
 def test_getFTLPID_default(host):
     """Confirms getFTLPID returns the default value if FTL is not running"""
     output = host.run(
@@ -57,3 +86,50 @@ def test_setFTLConfigValue_getFTLConfigValue(host):
     )
 
     assert "[ 9.9.9.9 ]" in output.stdout
+
+
+def test_updatecheck_remotes_and_cache(host):
+    """
+    Confirms updatecheck.sh queries the configured remotes, reuses cached
+    remote versions and bypasses the cache with --no-cache
+    """
+    mock_command_2("pihole-FTL", {"--config -q": ("", "0")}, host)
+    # The release metadata is only parsed if it could be fetched from the API
+    mock_command("jq", {"--raw-output": ("v9.9.9", "0")}, host)
+    host.run(
+        """
+    git -c init.defaultBranch=master init -q --bare /tmp/remote/pi-hole
+    git clone -q /tmp/remote/pi-hole /tmp/seed
+    cd /tmp/seed
+    git -c user.name=test -c user.email=test@test commit -q --allow-empty -m one
+    git push -q origin HEAD:refs/heads/master
+    mv /etc/.pihole /etc/.pihole.orig
+    git clone -q /tmp/remote/pi-hole /etc/.pihole
+    mkdir -p /tmp/api/pi-hole/releases
+    echo '{"tag_name": "v9.9.9"}' > /tmp/api/pi-hole/releases/latest
+    """
+    )
+    updatecheck = "PIHOLE_GITHUB_URL=file:///tmp/remote PIHOLE_GITHUB_API_URL=file:///tmp/api /opt/pihole/updatecheck.sh"
+    first_hash = host.check_output("git -C /tmp/seed rev-parse --short=8 HEAD")
+
+    host.run(updatecheck)
+    versions = host.check_output("cat /etc/pihole/versions")
+    assert "GITHUB_CORE_VERSION=v9.9.9" in versions
+    assert "GITHUB_CORE_HASH=" + first_hash in versions
+
+    host.run(
+        """
+    cd /tmp/seed
+    git -c user.name=test -c user.email=test@test commit -q --allow-empty -m two
+    git push -q origin HEAD:refs/heads/master
+    """
+    )
+    second_hash = host.check_output("git -C /tmp/seed rev-parse --short=8 HEAD")
+
+    host.run(updatecheck)
+    versions = host.check_output("cat /etc/pihole/versions")
+    assert "GITHUB_CORE_HASH=" + first_hash in versions
+
+    host.run(updatecheck + " --no-cache")
+    versions = host.check_output("cat /etc/pihole/versions")
+    assert "GITHUB_CORE_HASH=" + second_hash in versions